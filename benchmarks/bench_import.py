@@ -0,0 +1,159 @@
+"""
+Benchmark: import time of the entry points
+
+Runs each entry point in a fresh interpreter under -X importtime and sums
+the cumulative time of the top-level imports (best of --repeat runs). The
+command line and the GUI must come up without python-pptx, PIL, lxml or
+numpy; --check fails (exit code 1) when one of them is imported there, or
+when a target got slower than the baseline by more than --threshold.
+
+运行方法：
+python benchmarks/bench_import.py                    # 只打印结果
+python benchmarks/bench_import.py --save-baseline    # 写入 benchmarks/baselines/bench_import.json
+python benchmarks/bench_import.py --check            # 与基线比较
+python benchmarks/bench_import.py --modules 15       # 同时列出每个目标最慢的 15 个模块
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_import.json')
+# Target name -> interpreter arguments, run from the repository root
+TARGETS = {
+    'main --help': ['main.py', '--help'],
+    'gui': ['-c', 'import gui'],
+    'src.converter': ['-c', 'import src.converter'],
+    'src.renderer': ['-c', 'import src.renderer'],
+}
+# Targets that must start without the heavy modules
+LIGHT_TARGETS = ['main --help', 'gui', 'src.converter']
+HEAVY_MODULES = ['pptx', 'PIL', 'lxml', 'numpy']
+# Differences below this are noise, whatever the ratio
+MIN_REGRESSION_MS = 30.0
+
+
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us)} and the top-level modules, from -X importtime output."""
+    modules = {}
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+        if not name[1:].startswith(' '):
+            top_level.append(name.strip())
+    return modules, top_level
+
+
+def run_target(args):
+    """One run of a target; returns (total ms, {module: (self_us, cumulative_us)})."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    modules, top_level = parse_importtime(proc.stderr)
+    return sum(modules[name][1] for name in top_level) / 1000, modules
+
+
+def heavy_modules(modules):
+    return sorted({name.split('.')[0] for name in modules} & set(HEAVY_MODULES))
+
+
+def run_suite(repeat, show_modules):
+    results = {}
+    print(f"{'target':<16} {'import ms':>10} {'modules':>8}  heavy")
+    for name, args in TARGETS.items():
+        try:
+            # The first run also compiles bytecode; not counted
+            run_target(args)
+            runs = [run_target(args) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"{name:<16} skipped: {e}")
+            continue
+        total, modules = min(runs, key=lambda run: run[0])
+        heavy = heavy_modules(modules)
+        results[name] = {'ms': total, 'modules': len(modules), 'heavy': heavy}
+        print(f"{name:<16} {total:>10.1f} {len(modules):>8}  {', '.join(heavy) or '-'}")
+        if show_modules:
+            slowest = sorted(modules.items(), key=lambda item: -item[1][0])[:show_modules]
+            for module, (self_us, _) in slowest:
+                print(f"{'':<16} {self_us / 1000:>10.1f}  {module}")
+    return results
+
+
+def check(baseline, results, threshold):
+    """Prints the comparison; returns the number of failures."""
+    if baseline.get('environment', {}).get('platform') != platform.platform():
+        print(f"Warning: baseline was recorded on {baseline.get('environment', {}).get('platform')}")
+    failures = 0
+    print()
+    print(f"{'target':<16} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results.items():
+        if name in LIGHT_TARGETS and result['heavy']:
+            failures += 1
+            print(f"{name:<16} imports {', '.join(result['heavy'])}  HEAVY IMPORT")
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<16} (no baseline)")
+            continue
+        change = result['ms'] / base['ms'] - 1 if base['ms'] else 0.0
+        regressed = change > threshold and result['ms'] - base['ms'] > MIN_REGRESSION_MS
+        failures += regressed
+        mark = "  REGRESSION" if regressed else ""
+        print(f"{name:<16} {base['ms']:>8.1f}ms {result['ms']:>8.1f}ms {change:>+8.1%}{mark}")
+    return failures
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Time the imports of the entry points.")
+    arg_parser.add_argument('--repeat', type=int, default=5, help="runs per target; the best is kept")
+    arg_parser.add_argument('--modules', type=int, default=0, metavar='N',
+                            help="also list the N modules with the largest self time per target")
+    arg_parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    arg_parser.add_argument('--check', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    arg_parser.add_argument('--threshold', type=float, default=0.25,
+                            help="allowed slowdown per target before --check fails (0.25 = 25%%)")
+    args = arg_parser.parse_args()
+
+    baseline = None
+    if args.check:
+        with open(args.check, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = run_suite(args.repeat, args.modules)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'environment': {
+                    'python': platform.python_version(),
+                    'implementation': platform.python_implementation(),
+                    'platform': platform.platform(),
+                },
+                'repeat': args.repeat,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        failures = check(baseline, results, args.threshold)
+        if failures:
+            print(f"{failures} check(s) failed")
+            return 1
+        print("No heavy imports in the light targets and no target slower than the baseline "
+              f"by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
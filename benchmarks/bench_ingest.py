@@ -0,0 +1,100 @@
+"""
+Benchmark: DOCX ingestion in QuizParser.parse
+
+Compares the original two-pass ingestion (get_docx_text followed by
+get_docx_rich_text, each opening the zip and building a DOM with
+namespace-map findall lookups, copied below as the reference) against the
+single-pass get_docx_content, and checks both return the same text and runs.
+
+运行方法：
+python benchmarks/bench_ingest.py [题目数量]
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+import xml.etree.ElementTree as ET
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.parser import QuizParser
+from benchmarks.synthetic_docx import build_quiz_docx
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+NS = {'w': W}
+
+
+def _reference_tree(path):
+    with zipfile.ZipFile(path) as document:
+        return ET.fromstring(document.read('word/document.xml'))
+
+
+def reference_docx_text(path):
+    """get_docx_text as it was before the single pass: its own zip read and DOM."""
+    text_content = []
+    for p in _reference_tree(path).findall('.//w:p', NS):
+        texts = [node.text for node in p.findall('.//w:t', NS) if node.text]
+        text_content.append(''.join(texts))
+    return '\n'.join(text_content)
+
+
+def reference_docx_rich_text(path):
+    """get_docx_rich_text as it was before the single pass: a second zip read and DOM."""
+    paragraphs = []
+    for p in _reference_tree(path).findall('.//w:p', NS):
+        para_runs = []
+        for run in p.findall('.//w:r', NS):
+            t_elem = run.find('.//w:t', NS)
+            if t_elem is None or not t_elem.text:
+                continue
+            rPr = run.find('.//w:rPr', NS)
+            formatting = {'bold': False, 'italic': False, 'underline': False, 'emphasis': None}
+            if rPr is not None:
+                if rPr.find('.//w:b', NS) is not None:
+                    formatting['bold'] = True
+                if rPr.find('.//w:i', NS) is not None:
+                    formatting['italic'] = True
+                if rPr.find('.//w:u', NS) is not None:
+                    formatting['underline'] = True
+                em_elem = rPr.find('.//w:em', NS)
+                if em_elem is not None:
+                    em_val = em_elem.get('{%s}val' % W)
+                    formatting['emphasis'] = em_val if em_val else 'dot'
+            para_runs.append({'text': t_elem.text, 'format': formatting})
+        paragraphs.append(para_runs)
+    return paragraphs
+
+
+def two_pass(path):
+    return reference_docx_text(path), reference_docx_rich_text(path)
+
+
+def single_pass(parser, path):
+    return parser.get_docx_content(path)
+
+
+def main():
+    num_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    parser = QuizParser(streaming=False)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build_quiz_docx(os.path.join(tmp, 'bench.docx'), num_questions)
+        if two_pass(path) != single_pass(parser, path):
+            print("MISMATCH: single-pass ingestion differs from the two-pass reference")
+            sys.exit(1)
+
+        repeat = 5
+        t_two = min(timeit.repeat(lambda: two_pass(path), number=1, repeat=repeat))
+        t_one = min(timeit.repeat(lambda: single_pass(parser, path), number=1, repeat=repeat))
+
+    print(f"{num_questions} questions, best of {repeat}")
+    print(f"  two-pass    : {t_two * 1000:8.2f} ms")
+    print(f"  single-pass : {t_one * 1000:8.2f} ms")
+    print(f"  speedup     : {t_two / t_one:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
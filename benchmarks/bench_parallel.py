@@ -0,0 +1,75 @@
+"""
+Benchmark: parallel slide rendering
+
+Renders the same synthetic paper with add_question_slides at increasing
+worker counts and checks every run produces the same slides as workers=1.
+
+运行方法：
+python benchmarks/bench_parallel.py [题目数量] [最大进程数]
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.parser import QuizParser
+from src.renderer import QuizRenderer
+from benchmarks.synthetic_docx import build_quiz_docx
+
+
+def slides_digest(path):
+    with zipfile.ZipFile(path) as z:
+        h = hashlib.sha1()
+        for name in sorted(n for n in z.namelist() if n.startswith('ppt/slides/slide')):
+            h.update(z.read(name))
+        return h.hexdigest()
+
+
+def render(questions, subject, output_file, workers):
+    with contextlib.redirect_stdout(io.StringIO()):
+        renderer = QuizRenderer(output_file, subject)
+        renderer.create_title_slide()
+        start = time.perf_counter()
+        renderer.add_question_slides(questions, workers=workers)
+        elapsed = time.perf_counter() - start
+        renderer.save()
+    return elapsed
+
+
+def main():
+    num_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build_quiz_docx(os.path.join(tmp, 'bench.docx'), num_questions)
+        parser = QuizParser()
+        with contextlib.redirect_stdout(io.StringIO()):
+            questions = parser.parse(path)
+        subject = parser.infer_subject()
+
+        counts = sorted({1, max_workers} | {w for w in (2, 4, 8, 16) if w < max_workers})
+        baseline = None
+        for workers in counts:
+            output_file = os.path.join(tmp, f'out_{workers}.pptx')
+            elapsed = render(questions, subject, output_file, workers)
+            digest = slides_digest(output_file)
+            if baseline is None:
+                baseline = (elapsed, digest)
+            elif digest != baseline[1]:
+                print(f"MISMATCH: workers={workers} differs from workers=1")
+                sys.exit(1)
+            print(f"  workers={workers:<3}: {elapsed:>7.2f} s  ({baseline[0] / elapsed:.2f}x)")
+
+    print(f"{len(questions)} questions, {len(questions) * 3} slides identical at every worker count")
+
+
+if __name__ == "__main__":
+    main()
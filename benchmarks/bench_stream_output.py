@@ -0,0 +1,88 @@
+"""
+Benchmark: peak memory of in-memory vs streamed PPTX output
+
+Renders synthetic papers once with save() at the end and once with
+stream_to(), each in a fresh process (peak RSS from getrusage, as most of
+the slide tree lives in lxml, outside tracemalloc), and checks both decks
+hold the same parts.
+
+运行方法：
+python benchmarks/bench_stream_output.py [题目数量 ...]
+"""
+
+import hashlib
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_docx import build_quiz_docx
+
+MODES = ['memory', 'stream']
+
+
+def render(docx_path, output, mode):
+    """Child process: renders docx_path to output; prints seconds and peak RSS in MB."""
+    from src.parser import QuizParser
+    from src.renderer import QuizRenderer
+
+    parser = QuizParser()
+    questions = parser.parse(docx_path)
+    start = time.perf_counter()
+    renderer = QuizRenderer(output, parser.infer_subject())
+    if mode == 'stream':
+        renderer.stream_to()
+    renderer.create_title_slide()
+    renderer.add_question_slides(questions)
+    renderer.save()
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    print(f"{seconds} {peak_mb}")
+
+
+def parts_digest(path):
+    """SHA1 over the members in name order, so zip member order does not matter."""
+    with zipfile.ZipFile(path) as z:
+        h = hashlib.sha1()
+        for name in sorted(z.namelist()):
+            h.update(name.encode('utf-8'))
+            h.update(z.read(name))
+        return h.hexdigest()
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 500, 1000]
+    print(f"{'N':>6}  {'mode':<7} {'seconds':>8} {'peak MB':>8}  {'deck KB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            docx_path = build_quiz_docx(os.path.join(tmp, f'stream_{size}.docx'), size)
+            digests = set()
+            for mode in MODES:
+                output = os.path.join(tmp, f'{mode}_{size}.pptx')
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', docx_path, output, mode],
+                    cwd=ROOT, check=True, capture_output=True, text=True,
+                ).stdout.split()
+                seconds, peak_mb = float(out[-2]), float(out[-1])
+                digests.add(parts_digest(output))
+                print(f"{size:>6}  {mode:<7} {seconds:>8.2f} {peak_mb:>8.0f}  "
+                      f"{os.path.getsize(output) / 1024:>8.0f}")
+            if len(digests) != 1:
+                print(f"{size:>6}  MISMATCH: streamed deck differs from the in-memory one")
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        render(*sys.argv[2:])
+    else:
+        sys.exit(main())
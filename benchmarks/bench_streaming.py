@@ -0,0 +1,52 @@
+"""
+Benchmark: peak memory of DOM vs streaming (iterparse) ingestion
+
+Consumes QuizParser._iter_paragraphs without keeping the results, so the
+reported peak is what ingestion itself holds on to.
+
+运行方法：
+python benchmarks/bench_streaming.py [题目数量 ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.parser import QuizParser
+from benchmarks.synthetic_docx import build_quiz_docx
+
+
+def measure(path, streaming):
+    parser = QuizParser(streaming=streaming)
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = sum(1 for _ in parser._iter_paragraphs(path))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 20000]
+
+    print(f"{'questions':>10} {'xml MB':>8} {'mode':>10} {'paras':>8} {'time s':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = build_quiz_docx(os.path.join(tmp, f'bench_{n}.docx'), n)
+            with zipfile.ZipFile(path) as zf:
+                xml_mb = zf.getinfo('word/document.xml').file_size / 1e6
+            for streaming in (False, True):
+                count, elapsed, peak = measure(path, streaming)
+                mode = 'iterparse' if streaming else 'dom'
+                print(f"{n:>10} {xml_mb:>8.1f} {mode:>10} {count:>8} {elapsed:>8.2f} {peak / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark suite: conversion stages at 10/100/1000 questions
+
+Times get_docx_text, get_docx_rich_text, parse, infer_subject,
+add_question_slides and save on synthetic papers (best of --repeat runs,
+more for small papers),
+optionally stores the results as a JSON baseline, and with --check fails
+(exit code 1) when a stage got slower than the baseline by more than
+--threshold and by more than the noise of its runs.
+
+运行方法：
+python benchmarks/bench_suite.py                      # 只打印结果
+python benchmarks/bench_suite.py --save-baseline      # 写入 benchmarks/baselines/bench_suite.json
+python benchmarks/bench_suite.py --check              # 与基线比较，变慢超过 25% 时返回 1
+python benchmarks/bench_suite.py --sizes 10 100 --option-chars 20 --rich-density 0.5 --subject 物理
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.cache import renderer_version
+from src.parser import QuizParser
+from src.renderer import QuizRenderer
+from benchmarks.synthetic_docx import SUBJECT_VOCABULARY, build_quiz_docx
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_suite.json')
+STAGES = ['get_docx_text', 'get_docx_rich_text', 'parse', 'infer_subject', 'add_question_slides', 'save']
+# A stage's slowdown only counts past its own noise: an absolute floor, and
+# NOISE_FACTOR times the spread (median - best) of its runs, the larger of
+# the baseline's and the current one
+MIN_REGRESSION_SECONDS = 0.001
+NOISE_FACTOR = 3
+# Small papers get extra runs until their runs add up to this, so the best of
+# them is as stable as a single run of a large paper
+MIN_SECONDS_PER_SIZE = 2.0
+MAX_REPEAT = 30
+
+
+def timed(fn):
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def run_once(path):
+    """Times every stage once on the paper at path; returns {stage: seconds}."""
+    times = {}
+    parser = QuizParser()
+    times['get_docx_text'] = timed(lambda: parser.get_docx_text(path))
+    times['get_docx_rich_text'] = timed(lambda: parser.get_docx_rich_text(path))
+    times['parse'] = timed(lambda: parser.parse(path))
+    subject = []
+    times['infer_subject'] = timed(lambda: subject.append(parser.infer_subject()))
+
+    renderer = QuizRenderer(None, subject[0])
+    renderer.create_title_slide()
+    times['add_question_slides'] = timed(lambda: renderer.add_question_slides(parser.questions))
+    times['save'] = timed(lambda: renderer.save(io.BytesIO()))
+    return times
+
+
+def run_suite(sizes, repeat, knobs):
+    """Returns ({size: {stage: best seconds}}, {size: {stage: median - best}})."""
+    results = {}
+    spreads = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = build_quiz_docx(os.path.join(tmp, f'suite_{size}.docx'), size, **knobs)
+            runs = []
+            while len(runs) < repeat or (sum(map(sum_stages, runs)) < MIN_SECONDS_PER_SIZE
+                                         and len(runs) < MAX_REPEAT):
+                runs.append(run_once(path))
+            best = {s: min(times[s] for times in runs) for s in STAGES}
+            results[str(size)] = best
+            spreads[str(size)] = {s: statistics.median(times[s] for times in runs) - best[s]
+                                  for s in STAGES}
+            print_row(size, best)
+    return results, spreads
+
+
+def sum_stages(times):
+    return sum(times.values())
+
+
+def print_row(size, times):
+    cells = "  ".join(f"{times[s] * 1000:>10.2f}" for s in STAGES)
+    print(f"{size:>6}  {cells}")
+
+
+def print_header():
+    names = "  ".join(f"{s[:10]:>10}" for s in STAGES)
+    print(f"{'N':>6}  {names}   (ms, best of runs)")
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'renderer_version': renderer_version(),
+    }
+
+
+def check(baseline, results, spreads, knobs, threshold):
+    """Prints the comparison and returns the number of regressed stages."""
+    if baseline.get('document') != knobs:
+        print(f"Warning: baseline was recorded with document knobs {baseline.get('document')}")
+    if baseline.get('environment', {}).get('platform') != platform.platform():
+        print(f"Warning: baseline was recorded on {baseline.get('environment', {}).get('platform')}")
+
+    regressions = 0
+    print()
+    print(f"{'N':>6}  {'stage':<20} {'baseline':>10} {'now':>10} {'change':>8}")
+    for size, times in results.items():
+        base_times = baseline['results'].get(size)
+        if base_times is None:
+            print(f"{size:>6}  (no baseline)")
+            continue
+        base_spreads = baseline.get('spread', {}).get(size, {})
+        for stage in STAGES:
+            base, now = base_times.get(stage), times[stage]
+            if base is None:
+                continue
+            noise = max(spreads[size][stage], base_spreads.get(stage, 0.0))
+            change = now / base - 1 if base else 0.0
+            regressed = change > threshold and now - base > max(MIN_REGRESSION_SECONDS, NOISE_FACTOR * noise)
+            regressions += regressed
+            mark = "  REGRESSION" if regressed else ""
+            print(f"{size:>6}  {stage:<20} {base * 1000:>8.2f}ms {now * 1000:>8.2f}ms {change:>+8.1%}{mark}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Time the conversion stages on synthetic papers.")
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    arg_parser.add_argument('--repeat', type=int, default=3, help="runs per size; the best is kept")
+    arg_parser.add_argument('--option-chars', type=int, default=8)
+    arg_parser.add_argument('--explanation-chars', type=int, default=60)
+    arg_parser.add_argument('--rich-density', type=float, default=0.2)
+    arg_parser.add_argument('--subject', choices=sorted(SUBJECT_VOCABULARY), default='生物')
+    arg_parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    arg_parser.add_argument('--check', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    arg_parser.add_argument('--threshold', type=float, default=0.25,
+                            help="allowed slowdown per stage before --check fails (0.25 = 25%%)")
+    args = arg_parser.parse_args()
+
+    knobs = {
+        'option_chars': args.option_chars,
+        'explanation_chars': args.explanation_chars,
+        'rich_density': args.rich_density,
+        'subject': args.subject,
+    }
+    baseline = None
+    if args.check:
+        # Read first, so a missing baseline fails before minutes of timing
+        with open(args.check, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_header()
+    results, spreads = run_suite(args.sizes, args.repeat, knobs)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'environment': environment(),
+                'document': knobs,
+                'repeat': args.repeat,
+                'results': results,
+                'spread': spreads,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = check(baseline, results, spreads, knobs, args.threshold)
+        if regressions:
+            print(f"{regressions} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+        print(f"No stage slower than the baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Benchmark: line breaking for text height measurement
+
+Counts wrapped lines for long explanations with the original per-prefix
+getbbox loop, TextMeasurer.count_lines and TextMeasurer.count_lines_batch,
+and checks that all three agree on every text.
+
+运行方法：
+python benchmarks/bench_wrap.py [文本数量] [每段字数]
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.text_metrics import TextMeasurer, np
+
+STEM_CHARS = '本题考查学生对文章内容的理解与分析能力，需要结合上下文作答。The passage mainly tells us about reading habits. '
+
+
+def reference_count_lines(text, font, max_width_px):
+    """The wrap loop measure_text_exact used to run: one getbbox per prefix."""
+    lines = []
+    for para in text.split('\n'):
+        current_line = ""
+        for char in para:
+            test_line = current_line + char
+            if font.getbbox(test_line)[2] <= max_width_px:
+                current_line = test_line
+            else:
+                if current_line: lines.append(current_line)
+                current_line = char
+        if current_line: lines.append(current_line)
+    return max(len(lines), 1)
+
+
+def main():
+    num_texts = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    rng = random.Random(0)
+    texts = [''.join(rng.choice(STEM_CHARS) for _ in range(length)) for _ in range(num_texts)]
+
+    measurer = TextMeasurer()
+    font = measurer.get_font(measurer.font_path, int(20 * 1.333), 0)
+    max_width_px = int(10.8 * 96)
+
+    runs = [
+        ('reference', lambda: [reference_count_lines(t, font, max_width_px) for t in texts]),
+        ('count_lines', lambda: [measurer.count_lines(t, font, max_width_px) for t in texts]),
+        ('count_lines_batch', lambda: measurer.count_lines_batch(texts, font, max_width_px)),
+    ]
+
+    results = {}
+    for name, fn in runs:
+        start = time.perf_counter()
+        results[name] = fn()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<18}: {elapsed * 1000:>9.1f} ms")
+
+    if len(set(map(tuple, results.values()))) != 1:
+        print("MISMATCH between line counts")
+        sys.exit(1)
+
+    print(f"{num_texts} texts x {length} chars wrapped identically "
+          f"(NumPy {'on' if np is not None else 'off'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Synthetic quiz DOCX builder for benchmarks.
+
+Writes a minimal WordprocessingML package (no python-docx needed) containing
+N numbered questions, an options line, an answer line and an explanation.
+
+Without knobs every question repeats one fixed template. Passing any of
+option_chars, explanation_chars, rich_density or subject switches to
+generated text drawn from a subject vocabulary (seeded, so the same knobs
+always give the same document):
+
+    build_quiz_docx('q.docx', 100, option_chars=20, rich_density=0.3, subject='物理')
+"""
+
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+# Words the generated text is drawn from: (subject words, filler words, joiner)
+SUBJECT_VOCABULARY = {
+    '生物': (['细胞', '基因', '光合作用', '呼吸作用', '遗传', '进化', '蛋白质', '生态系统', '消化', '植物'],
+             ['下列', '关于', '的', '说法', '正确', '过程', '中', '能够', '主要'], ''),
+    '物理': (['电路', '加速度', '浮力', '压强', '磁场', '透镜', '能量', '速度', '电阻', '运动'],
+             ['下列', '关于', '的', '说法', '正确', '物体', '中', '受到', '大小'], ''),
+    '化学': (['分子', '原子', '氧化', '还原', '溶液', '元素', '反应', '酸', '碱', '方程式'],
+             ['下列', '关于', '的', '说法', '正确', '物质', '中', '生成', '质量'], ''),
+    '数学': (['函数', '方程', '导数', '概率', '数列', '三角', '面积', '几何', '等差', '体积'],
+             ['已知', '若', '的', '则', '求', '满足', '取值', '范围', '为'], ''),
+    '历史': (['朝代', '革命', '条约', '文明', '皇帝', '古代', '近代', '事件', '遗址', '历史'],
+             ['下列', '关于', '的', '说法', '正确', '时期', '中', '影响', '主要'], ''),
+    '英语': (['reading', 'passage', 'author', 'meaning', 'sentence', 'grammar', 'story', 'writer'],
+             ['the', 'of', 'and', 'to', 'in', 'is', 'which', 'that', 'it', 'for'], ' '),
+}
+
+# Run formats cycled through for formatted words
+RICH_FORMATS = [{'bold': True}, {'underline': True}, {'italic': True}]
+
+
+def _run(text, bold=False, underline=False, italic=False):
+    props = ''
+    if bold or underline or italic:
+        props = '<w:rPr>%s%s%s</w:rPr>' % (
+            '<w:b/>' if bold else '',
+            '<w:i/>' if italic else '',
+            '<w:u w:val="single"/>' if underline else '',
+        )
+    return '<w:r>%s<w:t xml:space="preserve">%s</w:t></w:r>' % (props, escape(text))
+
+
+def _para(*runs):
+    return '<w:p>%s</w:p>' % ''.join(runs)
+
+
+def question_paragraphs(n):
+    """Yields the w:p XML of question n (1-based)."""
+    answer = 'ABCD'[n % 4]
+    yield _para(
+        _run('%d. 下列关于细胞与' % n),
+        _run('能量', bold=True),
+        _run('转化的说法中，正确的是（ %s ）' % answer),
+    )
+    yield _para(_run('A. 细胞呼吸释放能量  B. 光合作用储存能量'))
+    yield _para(_run('C. 基因控制蛋白质合成  D. 以上说法均不正确'))
+    yield _para(_run('【答案】%s' % answer))
+    yield _para(_run('【解析】【分析】本题考查细胞代谢与'), _run('遗传', underline=True), _run('的基础知识。'))
+    yield _para(_run('植物通过光合作用把光能转化为化学能，储存在有机物中。'))
+
+
+def _words(rng, vocabulary, num_chars):
+    """Draws words (two fillers per subject word on average) until num_chars is reached."""
+    subject_words, fillers, joiner = vocabulary
+    words = []
+    length = 0
+    while length < num_chars:
+        word = rng.choice(subject_words if rng.random() < 0.35 else fillers)
+        words.append(word)
+        length += len(word) + len(joiner)
+    return words
+
+
+def _rich_runs(rng, vocabulary, num_chars, rich_density):
+    """Runs for num_chars of text; each word is formatted with probability rich_density."""
+    joiner = vocabulary[2]
+    runs = []
+    for word in _words(rng, vocabulary, num_chars):
+        fmt = rng.choice(RICH_FORMATS) if rng.random() < rich_density else {}
+        if runs and runs[-1][1] == fmt:
+            runs[-1][0] += joiner + word
+        else:
+            runs.append([(joiner if runs else '') + word, fmt])
+    return runs
+
+
+def _text(rng, vocabulary, num_chars):
+    return vocabulary[2].join(_words(rng, vocabulary, num_chars))
+
+
+def generated_question_paragraphs(n, rng, vocabulary, option_chars, explanation_chars, rich_density):
+    """Yields the w:p XML of question n with text drawn from vocabulary."""
+    answer = 'ABCD'[n % 4]
+    stem = _rich_runs(rng, vocabulary, 24, rich_density)
+    yield _para(
+        _run('%d. ' % n),
+        *(_run(text, **fmt) for text, fmt in stem),
+        _run('（ %s ）' % answer),
+    )
+
+    options = ['%s. %s' % (label, _text(rng, vocabulary, option_chars)) for label in 'ABCD']
+    # Short options share a line two by two, as in real papers
+    per_line = 2 if option_chars <= 12 else 1
+    for i in range(0, 4, per_line):
+        yield _para(_run('  '.join(options[i:i + per_line])))
+
+    yield _para(_run('【答案】%s' % answer))
+
+    # Explanation: a labelled first line, then continuation lines of ~30 characters
+    remaining = explanation_chars
+    first = _rich_runs(rng, vocabulary, min(remaining, 30), rich_density)
+    yield _para(_run('【解析】'), *(_run(text, **fmt) for text, fmt in first))
+    remaining -= 30
+    while remaining > 0:
+        yield _para(_run(_text(rng, vocabulary, min(remaining, 30))))
+        remaining -= 30
+
+
+def build_document_xml(num_questions, option_chars=None, explanation_chars=None,
+                       rich_density=None, subject=None, seed=0):
+    """
+    document.xml for num_questions questions.
+
+    option_chars: characters per option (over 12 puts each option on its own line)
+    explanation_chars: characters of explanation, split into ~30 character lines
+    rich_density: share of stem and explanation words that are bold/underline/italic
+    subject: a SUBJECT_VOCABULARY key the text is drawn from
+    """
+    knobs = (option_chars, explanation_chars, rich_density, subject)
+    if all(knob is None for knob in knobs):
+        paragraphs = (p for n in range(1, num_questions + 1) for p in question_paragraphs(n))
+    else:
+        rng = random.Random(seed)
+        vocabulary = SUBJECT_VOCABULARY[subject or '生物']
+        paragraphs = (
+            p
+            for n in range(1, num_questions + 1)
+            for p in generated_question_paragraphs(
+                n, rng, vocabulary,
+                8 if option_chars is None else option_chars,
+                60 if explanation_chars is None else explanation_chars,
+                0.2 if rich_density is None else rich_density,
+            )
+        )
+    body = ''.join(paragraphs)
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="%s"><w:body>%s<w:sectPr/></w:body></w:document>' % (W_NS, body)
+    )
+
+
+def build_quiz_docx(path, num_questions, **knobs):
+    """Writes a synthetic quiz document with num_questions questions to path (knobs: see build_document_xml)."""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', CONTENT_TYPES)
+        zf.writestr('_rels/.rels', PACKAGE_RELS)
+        zf.writestr('word/document.xml', build_document_xml(num_questions, **knobs))
+    return path
@@ -11,16 +11,24 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 try:
-    from src.parser import QuizParser
-    from src.renderer import QuizRenderer
+    from src.cache import ConversionCache
+    from src.converter import convert_file, output_path_for
 except ImportError as e:
-    # If starting from inside src or other weirdness
+    print(f"Import Error: {e}")
+    raise
+
+def warm_up_converter():
+    """
+    Imports the renderer (python-pptx, PIL) and preloads its template and
+    fonts in the background once the window is up; errors surface on
+    conversion.
+    """
     try:
-        from parser import QuizParser
-        from renderer import QuizRenderer
-    except ImportError:
-        print(f"Import Error: {e}")
-        raise
+        import src.renderer
+        from src.assets import warm_up
+        warm_up()
+    except Exception:
+        pass
 
 class QuizApp:
     def __init__(self, root):
@@ -81,6 +89,9 @@ class QuizApp:
         footer_frame.pack(fill=tk.X, side=tk.BOTTOM)
         self.lbl_status = ttk.Label(footer_frame, text="Ready", font=("Microsoft YaHei", 9))
         self.lbl_status.pack(side=tk.LEFT)
+
+        # Heavy imports once the window has been drawn
+        self.root.after_idle(lambda: threading.Thread(target=warm_up_converter, daemon=True).start())
         
     def log(self, message):
         self.txt_log.configure(state='normal')
@@ -124,78 +135,42 @@ class QuizApp:
         self.log(f"Starting conversion for: {os.path.basename(input_file)}")
         
         # Threading
+        self.input_file = input_file
         t = threading.Thread(target=self.run_conversion, args=(self.input_file,))
         t.start()
         
     def run_conversion(self, input_file): # input_file parameter is now redundant, but kept for compatibility
         try:
-            # 1. Parsing
-            self.lbl_status.config(text="正在分析文档并识别学科...", foreground="blue")
-            self.log("Step 1/2: Parsing Document...")
-            parser = QuizParser()
-            questions = parser.parse(self.input_file)
-            subject = parser.infer_subject()
-            
-            if not questions:
+            output_path = output_path_for(self.input_file)
+
+            # Parse, render and save; a document converted before with this
+            # renderer and these assets is copied from the cache
+            self.lbl_status.config(text="正在分析文档并生成幻灯片...", foreground="blue")
+            self.log("Parsing document and generating PowerPoint...")
+            result = convert_file(self.input_file, output_path, cache=ConversionCache())
+
+            if not result['output']:
                 self.log(f"错误: {os.path.basename(self.input_file)} 未发现试题")
                 self.lbl_status.config(text="转换失败", foreground="red") # Using existing lbl_status
                 self.finish_conversion(success=False)
                 return
 
-            self.log(f"成功识别学科: [{subject}]，提取共 {len(questions)} 道题目")
-
-            # 2. Rendering
-            self.lbl_status.config(text="正在生成幻灯片...", foreground="blue")
-            self.log("Step 2/2: Generating PowerPoint...")
-            
-            doc_title = os.path.basename(self.input_file).replace('.docx', '')
-            filename = os.path.basename(self.input_file).replace('.docx', '.pptx')
-            self.output_file = os.path.join(os.path.dirname(self.input_file), f"PPT_{filename}")
-            
-            # Auto-rename if locked logic (reused from main.py)
-            try:
-                # Test write access roughly? No, just try to create Renderer
-                # Renderer doesn't open file until save()
-                pass
-            except:
-                pass
-                
-            renderer = QuizRenderer(self.output_file, subject)
-            renderer.create_title_slide()
-            
-            # Progress loop?
-            # renderer.add_question_slides is atomic. 
-            # If we want progress per slide, we'd need to modify renderer to accept a callback.
-            # For now just run it.
-            renderer.add_question_slides(questions)
-            
-            saved = False
-            final_path = output_path
-            
-            try:
-                renderer.save()
-                saved = True
-            except PermissionError:
-                self.log(f"Warning: '{os.path.basename(output_path)}' is open. Trying new name...")
-                import time
-                final_path = output_path.replace('.pptx', f'_{int(time.time())}.pptx')
-                renderer.output_file = final_path
-                renderer.save()
-                saved = True
-                
-            if saved:
-                self.log(f"Success! Saved to:\n{final_path}")
-                self.finish_conversion(success=True)
+            if result['cached']:
+                self.log(f"命中缓存: [{result['subject']}]，共 {result['questions']} 道题目")
             else:
-                self.log("Failed to save document.")
-                self.finish_conversion(success=False)
-                
+                self.log(f"成功识别学科: [{result['subject']}]，提取共 {result['questions']} 道题目")
+            if result['output'] != output_path:
+                self.log(f"Warning: '{os.path.basename(output_path)}' is open. Saved under a new name.")
+            self.output_file = result['output']
+            self.log(f"Success! Saved to:\n{result['output']}")
+            self.finish_conversion(success=True)
+
         except Exception as e:
             import traceback
             err = traceback.format_exc()
             self.log(f"Critical Error:\n{err}")
             self.finish_conversion(success=False)
-            
+
     def finish_conversion(self, success):
         self.root.after(0, lambda: self._post_conversion(success))
         
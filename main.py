@@ -1,56 +1,174 @@
+import argparse
+import cProfile
+import glob
+import logging
 import sys
 import os
-from src.parser import QuizParser
-from src.renderer import QuizRenderer
-
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <input_docx_file>")
-        # Default fallback for testing if file exists
-        if os.path.exists('20251211.docx'):
-            input_file = '20251211.docx'
-            print(f"No argument provided. Using default: {input_file}")
-        else:
-            return
-    else:
-        input_file = sys.argv[1]
+import time
+from src.options import REVEAL_MODES, REVEAL_SLIDES
+from src.cache import ConversionCache
+from src.converter import convert_batch, convert_file, expand_inputs, format_summary
+from src.instrument import NULL_TIMER, STAGE_OTHER, StageTimer
 
+def convert_single(input_file, cache=None, timer=None, reveal=REVEAL_SLIDES, optimize=False,
+                   compress_level=None, stream=False):
     if not os.path.exists(input_file):
         print(f"Error: File '{input_file}' not found.")
         return
 
+    output_filename = f"PPT_{os.path.basename(input_file).replace('.docx', '.pptx')}"
     print(f"Analyzing {input_file}...")
-    
-    # 1. Parse
-    parser = QuizParser()
-    questions = parser.parse(input_file)
-    subject = parser.infer_subject()
-    print(f"Detected subject: {subject}")
-    print(f"Successfully extracted {len(questions)} questions.")
-    
-    if not questions:
+    result = convert_file(input_file, output_filename, cache=cache, timer=timer, reveal=reveal,
+                          optimize=optimize, compress_level=compress_level, stream=stream)
+
+    if result['cached']:
+        print(f"Cache hit: {result['subject']}, {result['questions']} questions.")
+    else:
+        print(f"Detected subject: {result['subject']}")
+        print(f"Successfully extracted {result['questions']} questions.")
+    if not result['output']:
         print("No questions found. Please check the document format.")
         return
 
-    # 2. Render
-    output_filename = f"PPT_{os.path.basename(input_file).replace('.docx', '.pptx')}"
-    print(f"Generating presentation: {output_filename}...")
-    
-    renderer = QuizRenderer(output_filename, subject)
-    renderer.create_title_slide()
-    renderer.add_question_slides(questions)
-    
-    try:
-        renderer.save()
+    if result['output'] == output_filename:
         print(f"Done! Saved to {output_filename}")
-    except PermissionError:
+    else:
         print(f"Warning: '{output_filename}' is open or locked.")
-        # Try new name
-        import time
-        new_filename = output_filename.replace('.pptx', f'_{int(time.time())}.pptx')
-        renderer.output_file = new_filename
-        renderer.save()
-        print(f"Done! Basic file was locked, saved to new file: {new_filename}")
+        print(f"Done! Basic file was locked, saved to new file: {result['output']}")
+    if result.get('size'):
+        from src.optimize import format_report
+        print(f"Optimized: {format_report(result['size'])}")
+
+def convert_many(patterns, jobs, cache=None, timer=None, reveal=REVEAL_SLIDES, optimize=False,
+                 compress_level=None, stream=False):
+    input_files = expand_inputs(patterns)
+    if not input_files:
+        print("No .docx files found.")
+        return 1
+
+    print(f"Converting {len(input_files)} files with {jobs or os.cpu_count()} jobs...")
+    start = time.perf_counter()
+
+    def report(result):
+        mark = "FAILED" if result.get('error') else ("cached" if result.get('cached') else "ok")
+        print(f"  [{mark}] {result['input']} ({result['seconds']:.2f}s)")
+
+    results = convert_batch(input_files, jobs=jobs, on_result=report, cache=cache,
+                            timed=timer is not None, reveal=reveal, optimize=optimize,
+                            compress_level=compress_level, stream=stream)
+    if timer:
+        # Per-file timings summed over the batch
+        for result in results:
+            if result.get('timings'):
+                timer.merge(result['timings'])
+    print()
+    print(format_summary(results))
+    optimized = [r['size'] for r in results if r.get('size')]
+    if optimized:
+        print(f"Optimization saved {sum(size['bytes_saved'] for size in optimized) / 1024:.0f} KB "
+              f"over {len(optimized)} files")
+    print(f"Wall time: {time.perf_counter() - start:.2f}s")
+    return 1 if any(r.get('error') for r in results) else 0
+
+def run_single(input_file, cache, timer, profile_path, reveal=REVEAL_SLIDES, optimize=False,
+               compress_level=None, stream=False):
+    """convert_single, timed as a whole and optionally under cProfile."""
+    profiler = cProfile.Profile() if profile_path else None
+    args = (input_file, cache, timer, reveal, optimize, compress_level, stream)
+    with (timer or NULL_TIMER).stage(STAGE_OTHER):
+        if profiler:
+            profiler.runcall(convert_single, *args)
+        else:
+            convert_single(*args)
+    if profiler:
+        profiler.dump_stats(profile_path)
+        print(f"cProfile dump written to {profile_path} (view with: python -m pstats {profile_path})")
+
+def report_timings(timer, args):
+    if args.profile:
+        print()
+        print(timer.format_table())
+    if args.metrics:
+        text = timer.to_json(indent=2) + "\n" if args.metrics == 'json' else timer.to_prometheus()
+        if args.metrics_file:
+            with open(args.metrics_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            sys.stdout.write(text)
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Convert DOCX quiz papers to PPTX presentations.",
+        epilog="Several inputs, a directory or a glob pattern switch to batch mode: "
+               "files are converted in parallel and PPT_*.pptx is written next to each input.",
+    )
+    arg_parser.add_argument('inputs', nargs='*', metavar='input',
+                            help="a .docx file, a directory of .docx files, or a glob like 'papers/*.docx'")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help="parallel conversions in batch mode (default: one per CPU)")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="always convert, without reading or writing the conversion cache")
+    arg_parser.add_argument('--cache-dir', default=None,
+                            help="conversion cache directory (default: ~/.cache/docxtoppt)")
+    arg_parser.add_argument('--reveal', choices=REVEAL_MODES, default=REVEAL_SLIDES,
+                            help="slides: three slides per question (blank, answer, analysis); "
+                                 "animate: one slide per question, revealed by click animations")
+    output_mode = arg_parser.add_mutually_exclusive_group()
+    output_mode.add_argument('--optimize', action='store_true',
+                             help="shrink the deck after saving: drop unused layouts and parts, "
+                                  "downsample images to their displayed size")
+    output_mode.add_argument('--stream', action='store_true',
+                             help="write each slide to the .pptx as soon as it is built, so memory "
+                                  "stays flat for very large papers")
+    arg_parser.add_argument('--compress-level', type=int, choices=range(10), default=None, metavar='0-9',
+                            help="deflate level of the .pptx zip, 0 = stored (fastest); "
+                                 "default 9 with --optimize, else python-pptx's")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="print per-stage timings and write a cProfile dump "
+                                 "(PPT_<name>.prof; single-file mode only)")
+    arg_parser.add_argument('--profile-out', default=None, metavar='PATH',
+                            help="write the cProfile dump to PATH instead (implies --profile)")
+    arg_parser.add_argument('--metrics', choices=['json', 'prometheus'], default=None,
+                            help="emit per-stage timings as JSON or Prometheus text")
+    arg_parser.add_argument('--metrics-file', default=None,
+                            help="write --metrics output to this file instead of stdout")
+    arg_parser.add_argument('-v', '--verbose', action='store_true',
+                            help="show debug logging from the parser and renderer")
+    args = arg_parser.parse_args()
+    args.profile = args.profile or args.profile_out is not None
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="[%(levelname)s] %(name)s: %(message)s")
+    cache = None if args.no_cache else ConversionCache(args.cache_dir)
+    timer = StageTimer() if args.profile or args.metrics else None
+
+    if not args.inputs:
+        print("Usage: python main.py <input_docx_file>")
+        # Default fallback for testing if file exists
+        if os.path.exists('20251211.docx'):
+            input_file = '20251211.docx'
+            print(f"No argument provided. Using default: {input_file}")
+            args.inputs = [input_file]
+        else:
+            return
+
+    batch = len(args.inputs) > 1 or any(os.path.isdir(p) or glob.has_magic(p) for p in args.inputs)
+    if batch:
+        if args.profile:
+            print("Note: the cProfile dump is only written in single-file mode.")
+        status = convert_many(args.inputs, args.jobs, cache, timer, args.reveal, args.optimize,
+                              args.compress_level, args.stream)
+    else:
+        input_file = args.inputs[0]
+        profile_path = None
+        if args.profile:
+            profile_path = args.profile_out or f"PPT_{os.path.basename(input_file).replace('.docx', '')}.prof"
+        run_single(input_file, cache, timer, profile_path, args.reveal, args.optimize,
+                   args.compress_level, args.stream)
+        status = None
+
+    if timer:
+        report_timings(timer, args)
+    return status
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+Headless HTTP conversion service.
+
+    POST /convert   request body: the .docx bytes; ?reveal=animate for one
+                    slide per question revealed by click animations,
+                    ?optimize=1 for a size-optimized deck
+                    200 -> the .pptx bytes (X-Subject, X-Questions and
+                    Server-Timing headers; X-Bytes-Saved when optimized)
+                    422 no questions found, 413 upload too large,
+                    429 queue full, 503 job over its CPU/memory/time budget
+    GET  /healthz   JSON status of the worker pool
+    GET  /metrics   per-stage conversion time summed over all jobs
+                    (Prometheus text format)
+
+Conversions run in a pre-forked pool of worker processes. At most
+workers + queue-depth jobs are accepted at a time, each job runs under a
+CPU-time and address-space budget (POSIX only), and a worker is replaced
+after --max-jobs-per-worker jobs to cap python-pptx memory growth. A job
+answered with 503 for running past its wall-clock limit keeps its slot until
+it actually ends, so abandoned jobs cannot pile up behind the pool.
+
+Standard library only:
+python service.py --port 8000 --workers 4
+curl --data-binary @paper.docx -o paper.pptx http://localhost:8000/convert
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+try:
+    import resource
+except ImportError:
+    # Windows: budgets are not enforced
+    resource = None
+
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.cache import ConversionCache, renderer_version
+from src.converter import convert_bytes
+from src.instrument import StageTimer
+from src.options import REVEAL_MODES, REVEAL_SLIDES
+
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+# --- Worker side ---
+_cpu_seconds = None
+
+
+def _on_cpu_limit(signum, frame):
+    raise BudgetExceeded("CPU time budget exceeded")
+
+
+def _init_worker(cpu_seconds, memory_mb):
+    """Pool initializer: installs the CPU-time handler and the memory cap."""
+    global _cpu_seconds
+    # The parent handles Ctrl+C and terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is None:
+        return
+    _cpu_seconds = cpu_seconds
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    # Warm template and fonts once per worker, outside any job's budget
+    from src.assets import warm_up
+    warm_up()
+
+
+def _set_cpu_budget(seconds):
+    """Sets the soft CPU limit to seconds beyond what this process has used so far."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def _convert_job(docx_bytes, use_cache, reveal=REVEAL_SLIDES, optimize=False):
+    """Worker: converts one upload under the job budgets; never raises."""
+    budgeted = resource is not None and _cpu_seconds
+    try:
+        if budgeted:
+            _set_cpu_budget(_cpu_seconds)
+        # Streamed unless optimized (which needs the whole deck), to stay within --memory-mb
+        return convert_bytes(docx_bytes, cache=ConversionCache() if use_cache else None,
+                             timer=StageTimer(), reveal=reveal, optimize=optimize,
+                             stream=not optimize)
+    except BudgetExceeded as e:
+        return {'error': str(e), 'budget': True}
+    except MemoryError:
+        return {'error': "memory budget exceeded", 'budget': True}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}", 'budget': False}
+    finally:
+        if budgeted:
+            _set_cpu_budget(None)
+
+
+# --- Server side ---
+class ConversionService:
+    """The worker pool plus admission control shared by all request threads."""
+
+    def __init__(self, workers, queue_depth, cpu_seconds, memory_mb, max_jobs_per_worker,
+                 max_upload_mb, use_cache):
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self.cpu_seconds = cpu_seconds
+        self.max_upload_bytes = max_upload_mb * 1024 * 1024
+        self.use_cache = use_cache
+        # A job that never comes back (worker killed by the memory cap) is abandoned after this
+        self.wall_seconds = (cpu_seconds or 300) * 2 + 30
+
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._timings = StageTimer()
+
+        # fork where available, so workers start from the already imported parent
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        self.pool = context.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(cpu_seconds, memory_mb),
+            maxtasksperchild=max_jobs_per_worker,
+        )
+
+    def try_acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            return False
+        with self._lock:
+            self._in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def convert(self, docx_bytes, reveal=REVEAL_SLIDES, optimize=False):
+        """
+        Runs one job on the pool under a slot from try_acquire; returns the
+        worker's result dict. The slot is released when the job ends, which
+        after a timeout is later than this returns.
+        """
+        over = threading.Event()
+
+        def job_over(_=None):
+            # Once only: the pool's callback and the give-up timer may both fire
+            with self._lock:
+                if over.is_set():
+                    return
+                over.set()
+            self.release()
+
+        try:
+            pending = self.pool.apply_async(_convert_job, (docx_bytes, self.use_cache, reveal, optimize),
+                                            callback=job_over, error_callback=job_over)
+        except BaseException:
+            job_over()
+            raise
+        try:
+            result = pending.get(timeout=self.wall_seconds)
+        except multiprocessing.TimeoutError:
+            # The job still occupies a worker. A worker that died mid-job never
+            # reports back, so the slot is given up on after another wall period
+            give_up = threading.Timer(self.wall_seconds, job_over)
+            give_up.daemon = True
+            give_up.start()
+            return {'error': "job did not finish in time", 'budget': True}
+        if result.get('timings'):
+            with self._lock:
+                self._timings.merge(result['timings'])
+        return result
+
+    def metrics(self):
+        with self._lock:
+            return self._timings.to_prometheus()
+
+    def health(self):
+        with self._lock:
+            return {
+                'status': 'ok',
+                'version': renderer_version(),
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'uptime_seconds': round(time.time() - self._started, 1),
+            }
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+def server_timing(timings):
+    """Server-Timing header value for a job's per-stage timings, in milliseconds."""
+    return ", ".join(
+        f"{name};dur={stage['seconds'] * 1000:.1f}" for name, stage in timings['stages'].items()
+    )
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    server_version = "docxtoppt"
+    service = None  # set by serve()
+
+    def _send(self, status, body=b"", content_type="text/plain; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/healthz':
+            self._send(200, json.dumps(self.service.health()), "application/json")
+        elif path == '/metrics':
+            self._send(200, self.service.metrics(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send(404, "not found\n")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self._send(404, "not found\n")
+            return
+        query = parse_qs(url.query)
+        reveal = query.get('reveal', [REVEAL_SLIDES])[0]
+        if reveal not in REVEAL_MODES:
+            self._send(400, f"reveal must be one of {', '.join(REVEAL_MODES)}\n")
+            return
+        optimize = query.get('optimize', ['0'])[0]
+        if optimize not in ('0', '1'):
+            self._send(400, "optimize must be 0 or 1\n")
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send(400, "request body must be the .docx file\n")
+            return
+        if length > self.service.max_upload_bytes:
+            self.close_connection = True
+            self._send(413, "upload too large\n")
+            return
+
+        # Admission control before reading the body, so a full server stays cheap
+        if not self.service.try_acquire():
+            self.close_connection = True
+            self._send(429, "conversion queue is full, retry later\n", headers={"Retry-After": "5"})
+            return
+        try:
+            docx_bytes = self.rfile.read(length)
+        except BaseException:
+            self.service.release()
+            raise
+        # convert releases the slot once the job ends
+        result = self.service.convert(docx_bytes, reveal, optimize == '1')
+
+        if result.get('error'):
+            status = 503 if result.get('budget') else 500
+            self._send(status, result['error'] + "\n")
+        elif not result['pptx']:
+            self._send(422, "no questions found in the document\n")
+        else:
+            headers = {
+                "X-Subject": quote(result['subject']),
+                "X-Questions": str(result['questions']),
+                "X-Cache": "hit" if result['cached'] else "miss",
+                "Server-Timing": server_timing(result['timings']),
+            }
+            if result.get('size'):
+                headers["X-Bytes-Saved"] = str(result['size']['bytes_saved'])
+            self._send(200, result['pptx'], PPTX_MIME, headers=headers)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+
+def serve(args):
+    service = ConversionService(
+        workers=args.workers,
+        queue_depth=args.queue_depth,
+        cpu_seconds=args.cpu_seconds,
+        memory_mb=args.memory_mb,
+        max_jobs_per_worker=args.max_jobs_per_worker,
+        max_upload_mb=args.max_upload_mb,
+        use_cache=not args.no_cache,
+    )
+    ConversionHandler.service = service
+    httpd = ThreadingHTTPServer((args.host, args.port), ConversionHandler)
+    httpd.daemon_threads = True
+    print(f"Serving on http://{args.host}:{args.port} "
+          f"({args.workers} workers, {service.capacity} jobs max)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="HTTP DOCX to PPTX conversion service.")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8000)
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="worker processes (default: one per CPU)")
+    arg_parser.add_argument('--queue-depth', type=int, default=8,
+                            help="jobs that may wait for a worker before requests get 429")
+    arg_parser.add_argument('--cpu-seconds', type=int, default=120,
+                            help="CPU time budget per job, 0 for none")
+    arg_parser.add_argument('--memory-mb', type=int, default=1024,
+                            help="address space cap per worker (a warm worker already maps ~150 MB), 0 for none")
+    arg_parser.add_argument('--max-jobs-per-worker', type=int, default=50,
+                            help="replace a worker after this many jobs")
+    arg_parser.add_argument('--max-upload-mb', type=int, default=20)
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="do not use the on-disk conversion cache")
+    serve(arg_parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Process-wide renderer assets.
+
+Loaded once per process and shared by every QuizRenderer: the python-pptx
+default template, the measurement fonts and the images placed on slides
+(the logo and the theme backgrounds). Images are read and SHA1-hashed once
+here; each renderer then creates one image part per image and relates it by
+rId wherever it is shown. Long-running hosts such as the Streamlit app call
+warm_up() at start, so the first conversion after a restart does not pay
+for them.
+"""
+
+import io
+import os
+from functools import lru_cache
+
+import pptx
+from pptx import Presentation
+from pptx.parts.image import Image
+
+from .text_metrics import get_measurer
+
+DEFAULT_TEMPLATE_PATH = os.path.join(os.path.dirname(pptx.__file__), "templates", "default.pptx")
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+LOGO_PATH = os.path.join(ASSETS_DIR, "logo_circle.png")
+
+# Stem, option and analysis font sizes used by the renderer
+MEASURED_FONT_SIZES = (26, 24, 20)
+
+
+@lru_cache(maxsize=None)
+def template_bytes():
+    """The default python-pptx template, read from disk once."""
+    with open(DEFAULT_TEMPLATE_PATH, 'rb') as f:
+        return f.read()
+
+
+def new_presentation():
+    """A fresh Presentation built from the in-memory template."""
+    return Presentation(io.BytesIO(template_bytes()))
+
+
+def _hashed_image(blob, filename):
+    image = Image.from_blob(blob, filename)
+    # sha1 is computed lazily and kept on the Image; do it now, once
+    image.sha1
+    return image
+
+
+@lru_cache(maxsize=None)
+def asset_image(path):
+    """The image file at path as a python-pptx Image, or None when it does not exist."""
+    try:
+        with open(path, 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return None
+    return _hashed_image(blob, os.path.basename(path))
+
+
+@lru_cache(maxsize=32)
+def blob_image(blob, filename):
+    """An in-memory image (e.g. a pre-rendered background) as a python-pptx Image."""
+    return _hashed_image(blob, filename)
+
+
+def warm_up():
+    """Loads the template, the logo and the measurement fonts; returns the shared measurer."""
+    template_bytes()
+    asset_image(LOGO_PATH)
+    measurer = get_measurer()
+    for size_pt in MEASURED_FONT_SIZES:
+        measurer.get_font(measurer.font_path, int(size_pt * 1.333), 0)
+    return measurer
@@ -0,0 +1,156 @@
+"""
+Pre-rendered theme backgrounds.
+
+The decorations of a subject theme (grid lines, organic circles, vintage
+border) are drawn once with PIL, together with the background colour, into
+a PNG at slide resolution. The PNG is cached on disk under a hash of
+everything that affects it, and in memory per process, so a deck carries
+one background image instead of up to 15 decoration shapes.
+
+Bump BACKGROUND_VERSION whenever the drawing changes.
+"""
+
+import colorsys
+import hashlib
+import io
+import os
+import random
+import tempfile
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+from .cache import DEFAULT_CACHE_DIR
+
+BACKGROUND_VERSION = 1
+BACKGROUND_DPI = 144
+# Drawn at this multiple of the target size and downsampled, for smooth edges
+SUPERSAMPLE = 2
+
+STYLE_GRID = 'grid'
+STYLE_CIRCLES = 'circles'
+STYLE_BORDER = 'border'
+
+SUBJECT_STYLES = {
+    "数学": STYLE_GRID,
+    "物理": STYLE_GRID,
+    "化学": STYLE_GRID,
+    "生物": STYLE_CIRCLES,
+    "地理": STYLE_CIRCLES,
+    "语文": STYLE_BORDER,
+    "历史": STYLE_BORDER,
+}
+
+
+def background_style(subject):
+    """The decoration style of a subject, or None for a plain colour background."""
+    return SUBJECT_STYLES.get(subject)
+
+
+def tint(rgb, brightness):
+    """
+    The colour PowerPoint shows for rgb with brightness in 0..1, i.e. with
+    its HSL lightness moved that far towards white (lumMod/lumOff).
+    """
+    h, l, s = colorsys.rgb_to_hls(*(c / 255 for c in rgb))
+    l = l * (1 - brightness) + brightness
+    return tuple(round(c * 255) for c in colorsys.hls_to_rgb(h, l, s))
+
+
+def _draw_grid(draw, px, width, height, accent, dark):
+    """15 hairline columns across the slide."""
+    color = tint(accent, 0.85)
+    line_w = max(1, round(px(0.01)))
+    for i in range(15):
+        x = round(i * width / 15)
+        draw.rectangle([x, 0, x + line_w - 1, height], fill=color)
+
+
+def _draw_circles(draw, px, width, height, accent, dark):
+    """8 soft circles at fixed pseudo-random positions."""
+    color = tint(accent, 0.92)
+    rng = random.Random(42)
+    for _ in range(8):
+        size = rng.uniform(1.5, 4)
+        x = rng.uniform(0, 13)
+        y = rng.uniform(0, 7)
+        draw.ellipse([px(x), px(y), px(x + size), px(y + size)], fill=color)
+
+
+def _draw_border(draw, px, width, height, accent, dark):
+    """Double border with filled corner squares."""
+    def outline(inset_in, line_pt, color):
+        # PowerPoint centres the stroke on the shape edge
+        half = px(line_pt / 72) / 2
+        inset = px(inset_in)
+        draw.rectangle(
+            [inset - half, inset - half, width - inset + half, height - inset + half],
+            outline=color, width=max(1, round(2 * half)),
+        )
+
+    outline(0.2, 3, dark)
+    outline(0.25, 1, accent)
+
+    margin = px(0.2)
+    corner = px(0.15)
+    for x, y in [(margin, margin), (width - margin - corner, margin),
+                 (margin, height - margin - corner), (width - margin - corner, height - margin - corner)]:
+        draw.rectangle([x, y, x + corner, y + corner], fill=dark)
+
+
+STYLE_PAINTERS = {
+    STYLE_GRID: _draw_grid,
+    STYLE_CIRCLES: _draw_circles,
+    STYLE_BORDER: _draw_border,
+}
+
+
+def render_background(style, bg, accent, dark, width_in, height_in, dpi=BACKGROUND_DPI):
+    """Draws a theme background; returns a PIL image of width_in x height_in at dpi."""
+    scale = dpi * SUPERSAMPLE
+    width, height = round(width_in * scale), round(height_in * scale)
+    image = Image.new('RGB', (width, height), bg)
+    STYLE_PAINTERS[style](ImageDraw.Draw(image), lambda inches: inches * scale, width, height, accent, dark)
+    return image.resize((round(width_in * dpi), round(height_in * dpi)), Image.LANCZOS)
+
+
+def theme_key(style, bg, accent, dark, width_in, height_in):
+    """Hash of everything that goes into a background image."""
+    spec = repr((BACKGROUND_VERSION, BACKGROUND_DPI, SUPERSAMPLE, style,
+                 tuple(bg), tuple(accent), tuple(dark), round(width_in, 3), round(height_in, 3)))
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+
+def background_cache_dir():
+    return os.path.join(os.environ.get("DOCXTOPPT_CACHE_DIR") or DEFAULT_CACHE_DIR, "backgrounds")
+
+
+@lru_cache(maxsize=32)
+def background_png(style, bg, accent, dark, width_in, height_in):
+    """
+    PNG bytes of a theme background, from the on-disk cache when present.
+
+    Colours are (r, g, b) tuples. An unwritable cache directory only means
+    the image is drawn again in the next process.
+    """
+    path = os.path.join(background_cache_dir(),
+                        theme_key(style, bg, accent, dark, width_in, height_in) + ".png")
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        pass
+
+    buffer = io.BytesIO()
+    render_background(style, bg, accent, dark, width_in, height_in).save(buffer, 'PNG', optimize=True)
+    png = buffer.getvalue()
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return png
@@ -0,0 +1,203 @@
+"""
+Content-addressed cache of finished conversions.
+
+A converted deck is stored under a key made from the DOCX bytes, the
+renderer's # VERSION header and the files in assets/, so re-uploading the
+same paper returns the stored PPTX without parsing or rendering, and any
+renderer or asset change misses naturally. The cache directory is capped in
+size and evicts least recently used entries; file mtimes record use.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RENDERER_PATH = os.path.join(ROOT_DIR, "src", "renderer.py")
+ASSETS_DIR = os.path.join(ROOT_DIR, "assets")
+
+logger = logging.getLogger(__name__)
+
+# Overridable with DOCXTOPPT_CACHE_DIR / DOCXTOPPT_CACHE_MB
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "docxtoppt")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def renderer_version():
+    """The '# VERSION: ...' header of renderer.py, read without importing it."""
+    try:
+        with open(RENDERER_PATH, 'r', encoding='utf-8') as f:
+            first_line = f.readline().strip()
+    except OSError:
+        return ""
+    return first_line if first_line.startswith("# VERSION") else ""
+
+
+@lru_cache(maxsize=None)
+def assets_fingerprint():
+    """Hash over the names and contents of everything in assets/."""
+    h = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(ASSETS_DIR):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            h.update(os.path.relpath(path, ASSETS_DIR).encode('utf-8'))
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    h.update(block)
+    return h.hexdigest()
+
+
+class ConversionCache:
+    """On-disk PPTX cache: <key>.pptx plus <key>.json with the conversion summary."""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or os.environ.get("DOCXTOPPT_CACHE_DIR") or DEFAULT_CACHE_DIR
+        if max_bytes is None:
+            env_mb = os.environ.get("DOCXTOPPT_CACHE_MB")
+            max_bytes = int(env_mb) * 1024 * 1024 if env_mb else DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+
+    def key(self, docx_bytes, variant=None):
+        """
+        Cache key for a DOCX given as bytes; variant names non-default
+        rendering options (e.g. the reveal mode) that change the deck.
+        """
+        h = hashlib.sha256(docx_bytes)
+        h.update(b"\0" + renderer_version().encode('utf-8'))
+        h.update(b"\0" + assets_fingerprint().encode('ascii'))
+        if variant:
+            h.update(b"\0" + variant.encode('utf-8'))
+        return h.hexdigest()
+
+    def key_for_file(self, docx_path, variant=None):
+        with open(docx_path, 'rb') as f:
+            return self.key(f.read(), variant)
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".pptx", base + ".json"
+
+    def get(self, key):
+        """
+        Returns the entry for key as a dict (path, subject, questions) or None.
+
+        A hit marks the entry as most recently used.
+        """
+        pptx_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            now = time.time()
+            os.utime(pptx_path, (now, now))
+            os.utime(meta_path, (now, now))
+        except (OSError, ValueError):
+            return None
+        entry['path'] = pptx_path
+        return entry
+
+    def put(self, key, pptx, subject, questions):
+        """
+        Stores a finished PPTX (a file path or the bytes) under key, then
+        evicts down to the size cap. Returns the entry, or None when the
+        cache directory is unusable; the cache is best effort, so that never
+        fails the conversion.
+        """
+        target_pptx, target_meta = self._paths(key)
+        tmp_paths = []
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            # Write to temp names and rename, so readers never see half a file
+            fd, tmp_pptx = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            tmp_paths.append(tmp_pptx)
+            if isinstance(pptx, (bytes, bytearray)):
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(pptx)
+            else:
+                os.close(fd)
+                shutil.copyfile(pptx, tmp_pptx)
+            os.replace(tmp_pptx, target_pptx)
+
+            fd, tmp_meta = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            tmp_paths.append(tmp_meta)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'subject': subject, 'questions': questions,
+                           'version': renderer_version()}, f, ensure_ascii=False)
+            os.replace(tmp_meta, target_meta)
+        except OSError as e:
+            logger.warning("Conversion cache not written (%s): %s", self.directory, e)
+            for path in tmp_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return None
+
+        self.evict()
+        return self.get(key)
+
+    def read(self, key):
+        """Returns (pptx_bytes, entry) for key, or None on a miss."""
+        entry = self.get(key)
+        if entry is None:
+            return None
+        try:
+            with open(entry['path'], 'rb') as f:
+                return f.read(), entry
+        except FileNotFoundError:
+            # Evicted by another process between get and read
+            return None
+
+    def copy_to(self, key, output_file):
+        """
+        Copies a cached PPTX to output_file; returns the entry or None on a
+        miss. An output_file that is open or locked raises PermissionError.
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        try:
+            shutil.copyfile(entry['path'], output_file)
+        except FileNotFoundError:
+            # Evicted by another process between get and copy
+            return None
+        return entry
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits max_bytes."""
+        entries = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            key, ext = os.path.splitext(name)
+            if ext not in (".pptx", ".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            size, used = entries.get(key, (0, 0))
+            entries[key] = (size + st.st_size, max(used, st.st_mtime))
+
+        total = sum(size for size, used in entries.values())
+        for key, (size, used) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
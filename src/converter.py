@@ -0,0 +1,320 @@
+"""
+DOCX -> PPTX conversion for one file or a batch of files.
+
+convert_file runs parse, subject inference, render and save for a single
+paper and reports what it did. convert_batch fans many papers out over a
+process pool, so a semester of papers pays interpreter and import startup
+once per worker instead of once per file. Both take an optional
+ConversionCache; a paper converted before is copied from the cache, and
+an optional StageTimer, whose per-stage timings are returned in the result.
+optimize and compress_level are passed on to QuizRenderer.save; with
+stream the deck is written slide by slide (QuizRenderer.stream_to), so
+memory does not grow with its length.
+
+The renderer (python-pptx, PIL) is imported when a conversion starts, so
+importing this module stays cheap for command lines and the GUI.
+"""
+
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .instrument import NULL_TIMER, STAGE_CACHE, STAGE_OTHER, STAGE_SHAPES, StageTimer
+from .options import REVEAL_SLIDES
+from .parser import QuizParser
+
+
+def output_path_for(input_file):
+    """PPT_<name>.pptx next to the input, as the GUI writes it."""
+    filename = os.path.basename(input_file).replace('.docx', '.pptx')
+    return os.path.join(os.path.dirname(input_file), f"PPT_{filename}")
+
+
+def _timestamped(output_file):
+    return output_file.replace('.pptx', f'_{int(time.time())}.pptx')
+
+
+def save_renderer(renderer, **options):
+    """
+    Saves the deck (options as for QuizRenderer.save); if the target is open
+    or locked, saves to a timestamped name instead.
+    """
+    try:
+        renderer.save(**options)
+    except PermissionError:
+        renderer.output_file = _timestamped(renderer.output_file)
+        renderer.save(**options)
+    return renderer.output_file
+
+
+def copy_cached(cache, key, output_file):
+    """
+    Copies the cached deck for key to output_file; if the target is open or
+    locked, copies to a timestamped name instead. Returns (entry, path
+    written), or (None, None) on a miss.
+    """
+    try:
+        entry = cache.copy_to(key, output_file)
+    except PermissionError:
+        output_file = _timestamped(output_file)
+        entry = cache.copy_to(key, output_file)
+    return (entry, output_file) if entry else (None, None)
+
+
+def stream_renderer(renderer, compress_level=None):
+    """
+    Starts streaming the deck to its output_file; if the target is open or
+    locked, streams to a timestamped name instead.
+    """
+    try:
+        renderer.stream_to(compress_level=compress_level)
+    except PermissionError:
+        renderer.output_file = _timestamped(renderer.output_file)
+        renderer.stream_to(compress_level=compress_level)
+    return renderer.output_file
+
+
+def cache_variant(reveal, optimize=False, compress_level=None):
+    """Cache key variant for the rendering and save options; None for the defaults."""
+    options = []
+    if reveal != REVEAL_SLIDES:
+        options.append(f"reveal={reveal}")
+    if optimize:
+        options.append("optimize")
+    if compress_level is not None:
+        options.append(f"compress_level={compress_level}")
+    return ",".join(options) or None
+
+
+def convert_file(input_file, output_file=None, workers=1, cache=None, timer=None,
+                 reveal=REVEAL_SLIDES, optimize=False, compress_level=None, stream=False):
+    """
+    Converts one DOCX paper; reveal is the QuizRenderer reveal mode.
+
+    Returns a result dict with input, output (None when no questions were
+    found), subject, questions (count), seconds and cached (True when the
+    deck came from cache). With a StageTimer, timings holds its as_dict();
+    an optimized conversion carries the optimize_pptx report in size.
+    stream writes the deck slide by slide; it cannot be combined with
+    optimize.
+    """
+    start = time.perf_counter()
+    output_file = output_file or output_path_for(input_file)
+    stages = timer or NULL_TIMER
+
+    with stages.stage(STAGE_OTHER):
+        with stages.stage(STAGE_CACHE):
+            variant = cache_variant(reveal, optimize, compress_level)
+            key = cache.key_for_file(input_file, variant) if cache else None
+            entry, copied_to = copy_cached(cache, key, output_file) if cache else (None, None)
+        if entry:
+            result = {
+                'input': input_file,
+                'output': copied_to,
+                'subject': entry['subject'],
+                'questions': entry['questions'],
+                'seconds': 0.0,
+                'cached': True,
+            }
+        else:
+            parser = QuizParser(timer=timer)
+            questions = parser.parse(input_file)
+            subject = parser.infer_subject()
+
+            result = {
+                'input': input_file,
+                'output': None,
+                'subject': subject,
+                'questions': len(questions),
+                'seconds': 0.0,
+                'cached': False,
+            }
+            if questions:
+                from .renderer import QuizRenderer
+                renderer = QuizRenderer(output_file, subject, timer=timer, reveal=reveal)
+                if stream:
+                    stream_renderer(renderer, compress_level)
+                try:
+                    with stages.stage(STAGE_SHAPES):
+                        renderer.create_title_slide()
+                    renderer.add_question_slides(questions, workers=workers)
+                except BaseException:
+                    renderer.discard_stream()
+                    raise
+                result['output'] = save_renderer(renderer, compress_level=compress_level,
+                                                 optimize=optimize)
+                if optimize:
+                    result['size'] = renderer.size_report
+                if cache:
+                    with stages.stage(STAGE_CACHE):
+                        cache.put(key, result['output'], subject, len(questions))
+
+    result['seconds'] = time.perf_counter() - start
+    if timer:
+        result['timings'] = timer.as_dict()
+    return result
+
+
+def convert_bytes(docx_bytes, cache=None, progress=None, timer=None, reveal=REVEAL_SLIDES,
+                  optimize=False, compress_level=None, stream=False):
+    """
+    Converts a DOCX given as bytes entirely in memory.
+
+    Returns a dict with pptx (the deck as bytes, None when no questions
+    were found), subject, questions and cached. progress(done, total) and
+    reveal are passed on to the renderer. With a StageTimer, timings holds
+    its as_dict(); an optimized conversion carries the optimize_pptx
+    report in size. stream keeps only the compressed deck in memory while
+    rendering; it cannot be combined with optimize.
+    """
+    stages = timer or NULL_TIMER
+    save_options = {'optimize': optimize, 'compress_level': compress_level}
+    with stages.stage(STAGE_OTHER):
+        result = _convert_bytes(docx_bytes, cache, progress, timer, stages, reveal, save_options, stream)
+    if timer:
+        result['timings'] = timer.as_dict()
+    return result
+
+
+def _convert_bytes(docx_bytes, cache, progress, timer, stages, reveal, save_options, stream):
+    with stages.stage(STAGE_CACHE):
+        key = cache.key(docx_bytes, cache_variant(reveal, **save_options)) if cache else None
+        cached = cache.read(key) if cache else None
+    if cached:
+        pptx_bytes, entry = cached
+        return {'pptx': pptx_bytes, 'subject': entry['subject'],
+                'questions': entry['questions'], 'cached': True}
+
+    parser = QuizParser(timer=timer)
+    questions = parser.parse(docx_bytes)
+    subject = parser.infer_subject()
+    if not questions:
+        return {'pptx': None, 'subject': subject, 'questions': 0, 'cached': False}
+
+    from .renderer import QuizRenderer
+    renderer = QuizRenderer(None, subject, timer=timer, reveal=reveal)
+    if stream:
+        # Only the compressed deck is held, not its object tree
+        buffer = io.BytesIO()
+        renderer.stream_to(buffer, save_options['compress_level'])
+    with stages.stage(STAGE_SHAPES):
+        renderer.create_title_slide()
+    renderer.add_question_slides(questions, progress=progress)
+    if stream:
+        renderer.save(optimize=save_options['optimize'])
+        pptx_bytes = buffer.getvalue()
+    else:
+        pptx_bytes = renderer.to_bytes(**save_options)
+    if cache:
+        with stages.stage(STAGE_CACHE):
+            cache.put(key, pptx_bytes, subject, len(questions))
+    result = {'pptx': pptx_bytes, 'subject': subject,
+              'questions': len(questions), 'cached': False}
+    if save_options['optimize']:
+        result['size'] = renderer.size_report
+    return result
+
+
+def _convert_quietly(input_file, cache=None, timed=False, reveal=REVEAL_SLIDES,
+                     optimize=False, compress_level=None, stream=False):
+    """Batch worker: convert_file that reports failures in its result; never raises."""
+    start = time.perf_counter()
+    try:
+        result = convert_file(input_file, cache=cache, timer=StageTimer() if timed else None,
+                              reveal=reveal, optimize=optimize, compress_level=compress_level,
+                              stream=stream)
+        if not result['questions']:
+            result['error'] = "no questions found"
+        return result
+    except Exception as e:
+        return {
+            'input': input_file,
+            'output': None,
+            'subject': None,
+            'questions': 0,
+            'seconds': time.perf_counter() - start,
+            'error': f"{type(e).__name__}: {e}",
+        }
+
+
+def expand_inputs(patterns):
+    """
+    Expands files, directories (their *.docx) and glob patterns to DOCX paths.
+
+    Word lock files (~$name.docx) are skipped and duplicates removed, keeping
+    the order the inputs were given in.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '*.docx')))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern]
+        for path in matches:
+            if os.path.basename(path).startswith('~$') or not path.lower().endswith('.docx'):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def convert_batch(input_files, jobs=None, on_result=None, cache=None, timed=False,
+                  reveal=REVEAL_SLIDES, optimize=False, compress_level=None, stream=False):
+    """
+    Converts input_files in a pool of jobs processes (None for one per CPU).
+
+    on_result(result) is called as each file finishes. A failing document
+    only marks its own result with an 'error' entry. With timed=True each
+    result carries its per-stage timings. reveal, optimize, compress_level
+    and stream are passed on to each conversion. Returns the results in
+    input order.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=min(jobs, max(len(input_files), 1))) as pool:
+        futures = {
+            pool.submit(_convert_quietly, path, cache, timed, reveal, optimize, compress_level, stream): path
+            for path in input_files
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. out of memory); the pool is rebuilt per batch
+                result = {'input': path, 'output': None, 'subject': None, 'questions': 0,
+                          'seconds': 0.0, 'error': f"{type(e).__name__}: {e}"}
+            results[path] = result
+            if on_result:
+                on_result(result)
+    return [results[path] for path in input_files]
+
+
+def format_summary(results):
+    """Summary table of a batch: one row per file plus a totals line."""
+    name_w = max([len("File")] + [len(os.path.basename(r['input'])) for r in results])
+    lines = [
+        f"{'File':<{name_w}}  {'Questions':>9}  {'Subject':<8}  {'Time':>8}  Result",
+        "-" * (name_w + 45),
+    ]
+    for r in results:
+        if r.get('error'):
+            status = f"FAILED: {r['error']}"
+        else:
+            status = os.path.basename(r['output']) + (" (cached)" if r.get('cached') else "")
+        lines.append(
+            f"{os.path.basename(r['input']):<{name_w}}  {r['questions']:>9}  "
+            f"{r['subject'] or '-':<8}  {r['seconds']:>7.2f}s  {status}"
+        )
+    failed = sum(1 for r in results if r.get('error'))
+    lines.append("-" * (name_w + 45))
+    lines.append(
+        f"{len(results) - failed} converted, {failed} failed, "
+        f"{sum(r['questions'] for r in results)} questions, "
+        f"{sum(r['seconds'] for r in results):.2f}s total conversion time"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,127 @@
+"""
+Per-stage timing for conversions.
+
+A StageTimer is handed to QuizParser and QuizRenderer, which wrap their
+stages (zip read, XML parse, line classification, subject inference, text
+measurement, shape creation, save) in timer.stage(name). Stages nest and
+are timed exclusively: time spent in an inner stage is not counted again
+in the outer one, so the stages add up to the wall time of the outermost.
+
+Components default to NULL_TIMER, whose stage() hands back one shared
+no-op context manager, so an untimed conversion pays only for the call.
+"""
+
+import json
+import time
+from contextlib import nullcontext
+
+# Stage names used by the parser, renderer and converter
+STAGE_CACHE = 'cache'
+STAGE_ZIP_READ = 'zip_read'
+STAGE_XML_PARSE = 'xml_parse'
+STAGE_CLASSIFY = 'classify'
+STAGE_SUBJECT = 'subject'
+STAGE_MEASURE = 'measure'
+STAGE_SHAPES = 'shapes'
+STAGE_SAVE = 'save'
+STAGE_OTHER = 'other'
+
+
+class _Stage:
+    __slots__ = ('timer', 'name', 'start', 'children')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.children = 0.0
+        self.timer._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.timer._stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        self.timer.add(self.name, elapsed - self.children)
+        return False
+
+
+class StageTimer:
+    """Accumulates exclusive seconds and call counts per stage name."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self._stack = []
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, seconds, calls=1):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def merge(self, timings):
+        """Adds the stages of another timer's as_dict() output."""
+        for name, stage in timings['stages'].items():
+            self.add(name, stage['seconds'], stage['calls'])
+
+    @property
+    def total(self):
+        return sum(self.seconds.values())
+
+    def as_dict(self):
+        return {
+            'total_seconds': self.total,
+            'stages': {
+                name: {'seconds': self.seconds[name], 'calls': self.calls[name]}
+                for name in self.seconds
+            },
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def to_prometheus(self, prefix='docxtoppt'):
+        """Prometheus text exposition format, one sample per stage."""
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Time spent in each conversion stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {seconds:.6f}'
+                  for name, seconds in self.seconds.items()]
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Number of times each conversion stage ran.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {calls}'
+                  for name, calls in self.calls.items()]
+        return "\n".join(lines) + "\n"
+
+    def format_table(self):
+        """Human readable stage table, slowest first."""
+        total = self.total or 1.0
+        lines = [f"{'Stage':<10} {'Seconds':>9} {'Share':>6} {'Calls':>7}"]
+        for name, seconds in sorted(self.seconds.items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<10} {seconds:>9.4f} {seconds / total:>6.1%} {self.calls[name]:>7}")
+        lines.append(f"{'total':<10} {self.total:>9.4f}")
+        return "\n".join(lines)
+
+
+class _NullTimer:
+    """Timer that records nothing."""
+
+    _context = nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def add(self, name, seconds, calls=1):
+        pass
+
+
+NULL_TIMER = _NullTimer()
@@ -0,0 +1,212 @@
+"""
+Background conversion jobs with live progress.
+
+JobQueue runs conversions in a pool of worker processes, so a large paper
+neither blocks the submitting session nor competes for the GIL with other
+users. Jobs are dispatched smallest upload first, and one worker is kept
+free for small uploads, so a short paper never waits behind several
+500-question ones. Workers report per-question progress through a shared
+manager dict; the page polls status(job_id). If a worker dies (e.g. killed
+for memory), the jobs in flight fail and the pool is replaced for the rest.
+
+Finished jobs are kept for a bounded time and count, and submitting the
+same upload again while its job is kept returns that job.
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .assets import warm_up
+from .cache import ConversionCache
+from .converter import convert_bytes
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Uploads below this size can always use the worker kept free for small jobs
+SMALL_JOB_BYTES = 256 * 1024
+# Finished jobs (and their PPTX bytes) kept in memory
+JOB_TTL_SECONDS = 60 * 60
+MAX_FINISHED_JOBS = 32
+
+
+def _init_job_worker():
+    warm_up()
+
+
+def _run_job(job_id, docx_bytes, cache, progress_map):
+    """Worker: converts one upload, publishing (done, total) per question."""
+    def report(done, total):
+        progress_map[job_id] = (done, total)
+
+    # Streamed, so a long paper does not hold its whole slide tree in the worker
+    return convert_bytes(docx_bytes, cache=cache, progress=report, stream=True)
+
+
+class JobQueue:
+    def __init__(self, max_workers=None, small_job_bytes=SMALL_JOB_BYTES, cache=None):
+        # At least two, so one worker is always left for small jobs
+        self.max_workers = max(2, max_workers or os.cpu_count() or 1)
+        self.small_job_bytes = small_job_bytes
+        self.cache = cache if cache is not None else ConversionCache()
+        # Large jobs may occupy every worker but one
+        self._large_slots = self.max_workers - 1
+
+        # spawn: the host (e.g. Streamlit) runs threads, which fork does not mix with
+        self._context = multiprocessing.get_context('spawn')
+        self._manager = self._context.Manager()
+        self._progress = self._manager.dict()
+        self._pool = self._new_pool()
+
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._by_key = {}
+        self._payloads = {}
+        self._pending = []  # heap of (upload size, submission order, job_id)
+        self._order = itertools.count()
+        self._running = 0
+        self._running_large = 0
+
+    def submit(self, docx_bytes, name=None):
+        """Queues a conversion of docx_bytes; returns the job id."""
+        key = self.cache.key(docx_bytes)
+        with self._lock:
+            self._prune()
+            job_id = self._by_key.get(key)
+            if job_id and self._jobs[job_id]['state'] != FAILED:
+                return job_id
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'name': name,
+                'key': key,
+                'size': len(docx_bytes),
+                'state': QUEUED,
+                'done': 0,
+                'total': None,
+                'result': None,
+                'error': None,
+                'submitted': time.time(),
+                'started': None,
+                'finished': None,
+            }
+            self._by_key[key] = job_id
+            self._payloads[job_id] = docx_bytes
+            heapq.heappush(self._pending, (len(docx_bytes), next(self._order), job_id))
+            self._dispatch()
+        return job_id
+
+    def status(self, job_id):
+        """
+        Returns a snapshot of the job as a dict, or None for an unknown or
+        expired job. state is one of queued, running, done, failed; done and
+        total count questions, result holds the convert_bytes result.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+            if job['state'] == QUEUED:
+                queued = [item[2] for item in sorted(self._pending)]
+                job['position'] = queued.index(job_id) + 1
+        if job['state'] == RUNNING:
+            job['done'], job['total'] = self._progress.get(job_id, (0, None))
+        return job
+
+    def _dispatch(self):
+        """Starts pending jobs while workers are free. Called with the lock held."""
+        while self._pending and self._running < self.max_workers:
+            size, _, job_id = self._pending[0]
+            large = size >= self.small_job_bytes
+            if large and self._running_large >= self._large_slots:
+                # The heap is ordered by size, so everything left is large too
+                break
+            heapq.heappop(self._pending)
+
+            job = self._jobs[job_id]
+            job['state'] = RUNNING
+            job['started'] = time.time()
+            self._running += 1
+            self._running_large += large
+
+            payload = self._payloads.pop(job_id)
+            try:
+                future = self._pool.submit(_run_job, job_id, payload, self.cache, self._progress)
+            except BrokenProcessPool:
+                # Workers died while idle; this job never ran, so it goes to a new pool
+                self._replace_pool()
+                future = self._pool.submit(_run_job, job_id, payload, self.cache, self._progress)
+            pool = self._pool
+            future.add_done_callback(
+                lambda future, job_id=job_id, large=large: self._finished(job_id, large, pool, future))
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=self._context, initializer=_init_job_worker)
+
+    def _replace_pool(self):
+        """Swaps a broken pool for a new one. Lock held."""
+        self._pool.shutdown(wait=False)
+        self._pool = self._new_pool()
+
+    def _finished(self, job_id, large, pool, future):
+        try:
+            result, error = future.result(), None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+            # A worker died (e.g. killed for memory): the jobs in flight on that
+            # pool fail, the pending ones go to a new pool
+            broken = isinstance(e, BrokenProcessPool)
+        else:
+            broken = False
+        try:
+            self._progress.pop(job_id, None)
+        except Exception:
+            # Manager already shut down
+            pass
+
+        with self._lock:
+            if broken and pool is self._pool:
+                self._replace_pool()
+            self._running -= 1
+            self._running_large -= large
+            job = self._jobs[job_id]
+            job['finished'] = time.time()
+            if error:
+                job['state'] = FAILED
+                job['error'] = error
+            else:
+                job['state'] = DONE
+                job['result'] = result
+                job['done'] = job['total'] = result['questions']
+            self._dispatch()
+
+    def _prune(self):
+        """Drops finished jobs past JOB_TTL_SECONDS or beyond MAX_FINISHED_JOBS. Lock held."""
+        finished = sorted(
+            (job for job in self._jobs.values() if job['state'] in (DONE, FAILED)),
+            key=lambda job: job['finished'],
+        )
+        cutoff = time.time() - JOB_TTL_SECONDS
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i >= excess and job['finished'] >= cutoff:
+                break
+            del self._jobs[job['id']]
+            if self._by_key.get(job['key']) == job['id']:
+                del self._by_key[job['key']]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
@@ -0,0 +1,370 @@
+"""
+Deck size: compression level on save and post-save optimization.
+
+write_presentation saves a python-pptx Presentation with a chosen deflate
+level (0 stores the parts uncompressed, the fastest write).
+
+optimize_pptx works on a finished .pptx at the zip/OPC level, so it applies
+to cached and third-party decks as well:
+
+- layouts no slide uses are dropped from their master, as are masters left
+  without used layouts (one of each is always kept);
+- the template's printer settings and thumbnail are dropped;
+- every part no longer reachable from the package relationships is removed,
+  with its content type override;
+- images larger than their displayed size at image_dpi are downsampled;
+- the zip is rewritten at compress_level.
+"""
+
+import io
+import math
+import posixpath
+import zipfile
+
+from lxml import etree
+from PIL import Image
+from pptx.opc.serialized import PackageWriter, _ZipPkgWriter
+from pptx.util import lazyproperty
+
+# Size over speed: optimize_pptx is an opt-in pass over a finished deck
+OPTIMIZE_COMPRESS_LEVEL = 9
+DEFAULT_IMAGE_DPI = 150
+# Images are only resampled when this much larger than needed
+RESAMPLE_SLACK = 1.1
+EMU_PER_INCH = 914400
+
+NS = {
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'ct': 'http://schemas.openxmlformats.org/package/2006/content-types',
+}
+R_ID = '{%s}id' % NS['r']
+R_EMBED = '{%s}embed' % NS['r']
+
+CONTENT_TYPES = '[Content_Types].xml'
+PACKAGE_RELS = '_rels/.rels'
+
+_OFFICE_RT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+RT_SLIDE_MASTER = _OFFICE_RT + 'slideMaster'
+RT_SLIDE_LAYOUT = _OFFICE_RT + 'slideLayout'
+RT_IMAGE = _OFFICE_RT + 'image'
+RT_OFFICE_DOCUMENT = _OFFICE_RT + 'officeDocument'
+RT_SLIDE = _OFFICE_RT + 'slide'
+# Relationships to parts no viewer needs: the template's printer settings and
+# its (stale) thumbnail
+DROPPED_RELATIONSHIPS = {
+    _OFFICE_RT + 'printerSettings',
+    'http://schemas.openxmlformats.org/package/2006/relationships/metadata/thumbnail',
+}
+IMAGE_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+
+
+def zip_options(compress_level):
+    """zipfile.ZipFile arguments for compress_level (None: deflate at zlib's default level)."""
+    if compress_level == 0:
+        return {'compression': zipfile.ZIP_STORED}
+    return {'compression': zipfile.ZIP_DEFLATED, 'compresslevel': compress_level}
+
+
+class _LeveledZipWriter(_ZipPkgWriter):
+    """python-pptx's zip writer with a configurable deflate level."""
+
+    def __init__(self, pkg_file, compress_level):
+        super().__init__(pkg_file)
+        self._compress_level = compress_level
+
+    @lazyproperty
+    def _zipf(self):
+        return zipfile.ZipFile(self._pkg_file, 'w', strict_timestamps=False,
+                               **zip_options(self._compress_level))
+
+
+class _LeveledPackageWriter(PackageWriter):
+    def __init__(self, pkg_file, pkg_rels, parts, compress_level):
+        super().__init__(pkg_file, pkg_rels, parts)
+        self._compress_level = compress_level
+
+    def _write(self):
+        with _LeveledZipWriter(self._pkg_file, self._compress_level) as phys_writer:
+            self._write_content_types_stream(phys_writer)
+            self._write_pkg_rels(phys_writer)
+            self._write_parts(phys_writer)
+
+
+def write_presentation(prs, file, compress_level=None):
+    """
+    Saves prs to file (a path or writable binary file-like object) with
+    compress_level 0 (stored) to 9; None keeps python-pptx's default.
+    """
+    if compress_level is None:
+        prs.save(file)
+        return
+    package = prs.part.package
+    _LeveledPackageWriter(file, package._rels, tuple(package.iter_parts()), compress_level)._write()
+
+
+# --- OPC helpers ---
+def _rels_name(part):
+    """Zip member holding the relationships of part ('' is the package)."""
+    if not part:
+        return PACKAGE_RELS
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, '_rels', name + '.rels')
+
+
+def _target(part, rel):
+    target = rel.get('Target')
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+
+
+def _internal_rels(rels_root):
+    return [rel for rel in rels_root if rel.get('TargetMode') != 'External']
+
+
+def _serialize(root):
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+class _Package:
+    """The members of a .pptx, with relationship files parsed on demand."""
+
+    def __init__(self, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.order = zf.namelist()
+            self.blobs = {name: zf.read(name) for name in self.order}
+        self.rels = {}
+        self.xml = {}
+
+    def rels_of(self, part):
+        """Parsed relationships of part, or None when it has none."""
+        name = _rels_name(part)
+        if name not in self.rels:
+            blob = self.blobs.get(name)
+            self.rels[name] = etree.fromstring(blob) if blob is not None else None
+        return self.rels[name]
+
+    def xml_of(self, part):
+        if part not in self.xml:
+            self.xml[part] = etree.fromstring(self.blobs[part])
+        return self.xml[part]
+
+    def parts_of_type(self, part, rel_type):
+        rels = self.rels_of(part)
+        if rels is None:
+            return []
+        return [(rel, _target(part, rel)) for rel in _internal_rels(rels) if rel.get('Type') == rel_type]
+
+    def remove_rel(self, part, rel, id_list_xpath=None):
+        """Removes rel from part, and the element referencing it from id_list_xpath."""
+        rel.getparent().remove(rel)
+        if id_list_xpath:
+            for element in self.xml_of(part).xpath(id_list_xpath, namespaces=NS):
+                if element.get(R_ID) == rel.get('Id'):
+                    element.getparent().remove(element)
+
+    def reachable(self):
+        """Parts reachable from the package relationships."""
+        seen = set()
+        stack = ['']
+        while stack:
+            part = stack.pop()
+            rels = self.rels_of(part)
+            if rels is None:
+                continue
+            for rel in _internal_rels(rels):
+                target = _target(part, rel)
+                if target not in seen and target in self.blobs:
+                    seen.add(target)
+                    stack.append(target)
+        return seen
+
+
+def _main_part(package):
+    return package.parts_of_type('', RT_OFFICE_DOCUMENT)[0][1]
+
+
+def _prune_masters_and_layouts(package, presentation):
+    """Drops unused layouts and masters from the relationship graph."""
+    used_layouts = set()
+    for _, slide in package.parts_of_type(presentation, RT_SLIDE):
+        used_layouts.update(layout for _, layout in package.parts_of_type(slide, RT_SLIDE_LAYOUT))
+
+    masters = package.parts_of_type(presentation, RT_SLIDE_MASTER)
+    kept_masters = 0
+    for index, (master_rel, master) in enumerate(masters):
+        layouts = package.parts_of_type(master, RT_SLIDE_LAYOUT)
+        used = [layout for _, layout in layouts if layout in used_layouts]
+        last_master = index == len(masters) - 1 and not kept_masters
+        if not used and not last_master:
+            package.remove_rel(presentation, master_rel, '//p:sldMasterIdLst/p:sldMasterId')
+            continue
+        kept_masters += 1
+        # A master keeps at least one layout
+        keep = set(used) or {layout for _, layout in layouts[:1]}
+        for layout_rel, layout in layouts:
+            if layout not in keep:
+                package.remove_rel(master, layout_rel, '//p:sldLayoutIdLst/p:sldLayoutId')
+
+
+def _drop_metadata_rels(package, parts):
+    for part in parts:
+        rels = package.rels_of(part)
+        if rels is None:
+            continue
+        source = package.blobs[part] if part else b''
+        for rel in list(rels):
+            # Only when the part's own XML does not point at it
+            if rel.get('Type') in DROPPED_RELATIONSHIPS and ('"%s"' % rel.get('Id')).encode() not in source:
+                package.remove_rel(part, rel)
+
+
+def _slide_size_inches(package, presentation):
+    size = package.xml_of(presentation).find('p:sldSz', NS)
+    return int(size.get('cx')) / EMU_PER_INCH, int(size.get('cy')) / EMU_PER_INCH
+
+
+def _displayed_inches(blip, slide_size):
+    """Width and height of the image in blip as shown, or None if unknown."""
+    scale_x = scale_y = 1.0
+    size = None
+    for ancestor in blip.iterancestors():
+        tag = etree.QName(ancestor).localname
+        if size is None:
+            if tag == 'bg':
+                size = slide_size
+                break
+            ext = ancestor.find('p:spPr/a:xfrm/a:ext', NS)
+            if ext is not None:
+                size = (int(ext.get('cx')) / EMU_PER_INCH, int(ext.get('cy')) / EMU_PER_INCH)
+        elif tag == 'grpSp':
+            ext = ancestor.find('p:grpSpPr/a:xfrm/a:ext', NS)
+            child = ancestor.find('p:grpSpPr/a:xfrm/a:chExt', NS)
+            if ext is not None and child is not None and int(child.get('cx')) and int(child.get('cy')):
+                scale_x *= int(ext.get('cx')) / int(child.get('cx'))
+                scale_y *= int(ext.get('cy')) / int(child.get('cy'))
+    if size is None:
+        return None
+
+    # A cropped image shows only part of its pixels at that size
+    crop = blip.getparent().find('a:srcRect', NS)
+    shown_x = shown_y = 1.0
+    if crop is not None:
+        shown_x -= (int(crop.get('l', 0)) + int(crop.get('r', 0))) / 100000
+        shown_y -= (int(crop.get('t', 0)) + int(crop.get('b', 0))) / 100000
+    if shown_x <= 0 or shown_y <= 0:
+        return None
+    return size[0] * scale_x / shown_x, size[1] * scale_y / shown_y
+
+
+def _image_display_sizes(package, parts, slide_size):
+    """{image part: largest displayed (width, height) in inches}; None when unknown somewhere."""
+    sizes = {}
+    for part in parts:
+        images = {rel.get('Id'): target for rel, target in package.parts_of_type(part, RT_IMAGE)}
+        if not images:
+            continue
+        referenced = set()
+        for blip in package.xml_of(part).iter('{%s}blip' % NS['a']):
+            image = images.get(blip.get(R_EMBED))
+            if image is None:
+                continue
+            referenced.add(image)
+            shown = _displayed_inches(blip, slide_size)
+            if shown is None or sizes.get(image, ()) is None:
+                sizes[image] = None
+            else:
+                current = sizes.get(image, (0.0, 0.0))
+                sizes[image] = (max(current[0], shown[0]), max(current[1], shown[1]))
+        # Referenced some other way (e.g. r:link, OLE previews): leave alone
+        for image in set(images.values()) - referenced:
+            sizes[image] = None
+    return sizes
+
+
+def _resample(blob, image_format, inches, dpi):
+    """blob downsampled to inches at dpi, or None when that would not help."""
+    with Image.open(io.BytesIO(blob)) as image:
+        width, height = image.size
+        scale = max(inches[0] * dpi / width, inches[1] * dpi / height)
+        if scale * RESAMPLE_SLACK >= 1:
+            return None
+        size = (max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale)))
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGBA' if image_format == 'PNG' else 'RGB')
+        resized = image.resize(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    if image_format == 'PNG':
+        resized.save(buffer, 'PNG', optimize=True)
+    else:
+        resized.save(buffer, 'JPEG', quality=90, optimize=True)
+    return buffer.getvalue() if buffer.tell() < len(blob) else None
+
+
+def optimize_pptx(data, compress_level=OPTIMIZE_COMPRESS_LEVEL, image_dpi=DEFAULT_IMAGE_DPI):
+    """
+    Optimizes the .pptx in data; image_dpi=None leaves images untouched.
+
+    Returns (optimized bytes, report); report holds bytes_before,
+    bytes_after, bytes_saved, parts_removed and images_resampled.
+    """
+    package = _Package(data)
+    presentation = _main_part(package)
+
+    _prune_masters_and_layouts(package, presentation)
+    _drop_metadata_rels(package, ['', presentation])
+    reachable = package.reachable()
+
+    removed = {name for name in package.order
+               if name not in (CONTENT_TYPES, PACKAGE_RELS) and not name.endswith('.rels')
+               and name not in reachable}
+    removed |= {_rels_name(part) for part in removed}
+
+    resampled = 0
+    if image_dpi:
+        slide_size = _slide_size_inches(package, presentation)
+        sizes = _image_display_sizes(package, sorted(reachable), slide_size)
+        for image, inches in sizes.items():
+            image_format = IMAGE_FORMATS.get(posixpath.splitext(image)[1].lower())
+            if inches is None or image_format is None:
+                continue
+            blob = _resample(package.blobs[image], image_format, inches, image_dpi)
+            if blob is not None:
+                package.blobs[image] = blob
+                resampled += 1
+
+    content_types = etree.fromstring(package.blobs[CONTENT_TYPES])
+    for override in content_types.findall('ct:Override', NS):
+        if override.get('PartName')[1:] in removed:
+            content_types.remove(override)
+    package.blobs[CONTENT_TYPES] = _serialize(content_types)
+    for name, root in package.rels.items():
+        if root is not None:
+            package.blobs[name] = _serialize(root)
+    for part, root in package.xml.items():
+        if part not in removed:
+            package.blobs[part] = _serialize(root)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', **zip_options(compress_level)) as zf:
+        for name in package.order:
+            if name not in removed:
+                zf.writestr(name, package.blobs[name])
+    optimized = buffer.getvalue()
+    return optimized, {
+        'bytes_before': len(data),
+        'bytes_after': len(optimized),
+        'bytes_saved': len(data) - len(optimized),
+        'parts_removed': sum(1 for name in removed if not name.endswith('.rels')),
+        'images_resampled': resampled,
+    }
+
+
+def format_report(report):
+    """One line summary of an optimize_pptx report."""
+    return (f"{report['bytes_before'] / 1024:.0f} KB -> {report['bytes_after'] / 1024:.0f} KB "
+            f"(saved {report['bytes_saved'] / 1024:.0f} KB, {report['parts_removed']} parts removed, "
+            f"{report['images_resampled']} images resampled)")
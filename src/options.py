@@ -0,0 +1,12 @@
+"""
+Rendering options shared by the renderer, converter and entry points.
+
+Kept free of python-pptx and PIL so command lines can be parsed and
+validated before any heavy import.
+"""
+
+# Reveal modes: three slides per question (blank, answer, analysis), or one
+# slide revealing answer and analysis with click animations
+REVEAL_SLIDES = 'slides'
+REVEAL_ANIMATE = 'animate'
+REVEAL_MODES = (REVEAL_SLIDES, REVEAL_ANIMATE)
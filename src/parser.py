@@ -1,323 +1,580 @@
+import io
+import logging
 import re
 import zipfile
+import zlib
+from collections import Counter
 import xml.etree.ElementTree as ET
 import os
 
+try:
+    from .text_utils import (
+        plain_to_rich, rich_text_to_plain, run_offsets, slice_runs, strip_runs, sub_runs,
+    )
+    from .instrument import (
+        NULL_TIMER, STAGE_CLASSIFY, STAGE_SUBJECT, STAGE_XML_PARSE, STAGE_ZIP_READ,
+    )
+except ImportError:
+    # Imported as a top-level module with src/ on sys.path (test_rich_text.py)
+    from text_utils import (
+        plain_to_rich, rich_text_to_plain, run_offsets, slice_runs, strip_runs, sub_runs,
+    )
+    from instrument import (
+        NULL_TIMER, STAGE_CLASSIFY, STAGE_SUBJECT, STAGE_XML_PARSE, STAGE_ZIP_READ,
+    )
+
+logger = logging.getLogger(__name__)
+
+# What a damaged or non-DOCX input raises while it is read: not a zip, no
+# word/document.xml, a truncated member or malformed XML
+DOCX_READ_ERRORS = (
+    OSError, EOFError, KeyError, NotImplementedError, zipfile.BadZipFile, zlib.error, ET.ParseError,
+)
+
+# WordprocessingML tags in Clark notation, resolved once
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = '{%s}p' % W_NS
+W_R = '{%s}r' % W_NS
+W_T = '{%s}t' % W_NS
+W_RPR = '{%s}rPr' % W_NS
+W_B = '{%s}b' % W_NS
+W_I = '{%s}i' % W_NS
+W_U = '{%s}u' % W_NS
+W_EM = '{%s}em' % W_NS
+W_VAL = '{%s}val' % W_NS
+
+# document.xml size (uncompressed) above which parsing switches to iterparse
+STREAMING_THRESHOLD = 8 * 1024 * 1024
+
+# Line kinds produced by classify_line
+LINE_QUESTION = 'question'
+LINE_OPTION = 'option'
+LINE_ANSWER = 'answer'
+LINE_EXPLANATION = 'explanation'
+LINE_TEXT = 'text'
+
+# Anchored line heads: "12." question numbers and the answer/explanation labels.
+# Bare "解析" is detected but (unlike 解析：/解析:) is not stripped as a label.
+LINE_HEAD_RE = re.compile(
+    r'(?P<number>\d+)\.'
+    r'|(?P<answer>【答案】|答案：|Answer:)'
+    r'|(?P<explanation>【解析】|解析[：:]|Explanation:?|解析)'
+)
+OPTION_HINT_RE = re.compile(r'(?:^|\s)[A-D]\.')
+OPTION_LABEL_RE = re.compile(r'([A-D])\.')
+ANSWER_LETTER_RE = re.compile(r'[A-D]')
+
+# Stem normalisation: every blank becomes "（   ）"
+BLANK = '（   ）'
+INLINE_ANSWER_RE = re.compile(r'[（\(]\s*([A-D])\s*[）\)]')
+UNDERSCORE_BLANK_RE = re.compile(r'_{2,}')
+EMPTY_BRACKET_RE = re.compile(r'（\s*）')
+
+WHITESPACE_RE = re.compile(r'\s+')
+# 【...】 tags inside explanations (e.g. 【分析】)
+EXPLANATION_TAG_RE = re.compile(r'【[^】]*】')
+
+
+SUBJECT_KEYWORDS = {
+    "语文": ["语", "文言文", "阅读理解", "拼音", "字词", "修辞", "古诗", "成语", "散文", "鲁迅", "唐诗", "宋词"],
+    "数学": ["算", "方程", "几何", "函数", "导数", "概率", "数值", "三角", "面积", "体积", "周长", "等差", "数列"],
+    "物理": ["力", "电", "磁", "光", "运动", "速度", "加速度", "功", "能量", "压强", "浮力", "电路", "透镜"],
+    "化学": ["化学", "反应", "分子", "原子", "元素", "氧化", "还原", "酸", "碱", "盐", "溶液", "方程式"],
+    "生物": ["细胞", "基因", "生物", "植物", "动物", "进化", "遗传", "光合", "呼吸", "系统", "消化"],
+    "英语": ["the", "of", "and", "a", "to", "in", "is", "you", "that", "it", "he", "was", "for", "on", "are"],
+    "地理": ["地图", "经纬", "气候", "地形", "板块", "河流", "人口", "农业", "工业", "资源"],
+    "历史": ["历史", "朝代", "皇帝", "事件", "革命", "近代", "古代", "文明", "遗址", "条约"],
+    "政治": ["政治", "法律", "公民", "国家", "党", "建设", "发展", "社会", "价值", "思想"]
+}
+
+LATIN_RE = re.compile(r'[a-zA-Z]')
+# Questions scanned between checks for an unassailable subject lead
+SUBJECT_SCAN_BLOCK = 32
+
+
+def _trie_pattern(words):
+    """Builds a regex that matches any of words, branching one character at a time."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = '(?:%s)' % '|'.join(branches)
+        # A word ending here makes the longer continuations optional
+        return body + '?' if '' in node else body
+
+    return build(trie)
+
+
+def _build_keyword_tables():
+    """
+    Compiles the subject keywords into a single multi-pattern scanner.
+
+    The keywords are folded into a trie-shaped regex (greedy, so the longest
+    keyword at a position wins) inside a lookahead, so every text position is
+    tried and overlapping occurrences are seen too. Matching the longest
+    keyword at a position also means each keyword prefix of it occurs there;
+    KEYWORD_SCORES folds those into per-subject weights for every keyword
+    the scanner can report. Self-overlapping keywords (e.g. "that") are
+    counted with str.count() so scores keep str.count() semantics.
+    """
+    subjects_by_kw = {}
+    for subj, keywords in SUBJECT_KEYWORDS.items():
+        for kw in keywords:
+            subjects_by_kw.setdefault(kw, []).append(subj)
+
+    ordered = sorted(subjects_by_kw, key=len, reverse=True)
+    first_chars = '[%s]' % ''.join(sorted({re.escape(kw[0]) for kw in ordered}))
+    # Consuming one first-character lets the engine skip other positions with
+    # a fast charset search; the lookbehind then re-reads that character and
+    # the lookahead inside it captures the keyword without consuming it.
+    scan_re = re.compile('%s(?<=(?=(%s))%s)' % (first_chars, _trie_pattern(ordered), first_chars))
+
+    # Keywords like "that" can overlap themselves, which str.count() does not
+    # count twice
+    self_overlapping = tuple(
+        (kw, tuple(subjects_by_kw[kw])) for kw in ordered
+        if any(kw[:k] == kw[-k:] for k in range(1, len(kw)))
+    )
+    skip = {kw for kw, _ in self_overlapping}
+
+    keyword_scores = {}
+    for kw in ordered:
+        weights = {}
+        for other in ordered:
+            if kw.startswith(other) and other not in skip:
+                for subj in subjects_by_kw[other]:
+                    weights[subj] = weights.get(subj, 0) + 1
+        keyword_scores[kw] = tuple(weights.items())
+
+    # Upper bound of score each subject can gain from a single text position
+    max_hits = dict.fromkeys(SUBJECT_KEYWORDS, 0)
+    for kw in ordered:
+        for subj, weight in keyword_scores[kw]:
+            max_hits[subj] = max(max_hits[subj], weight)
+    for kw, subjects in self_overlapping:
+        for subj in subjects:
+            max_hits[subj] += 1
+    return scan_re, keyword_scores, self_overlapping, max_hits
+
+
+KEYWORD_SCAN_RE, KEYWORD_SCORES, SELF_OVERLAPPING_KEYWORDS, MAX_HITS_PER_CHAR = _build_keyword_tables()
+
+
+def classify_line(line):
+    """
+    Tags a stripped, non-empty line as question/option/answer/explanation/text.
+
+    Returns (kind, head_match). Precedence matches the parse loop: a question
+    number wins over option markers, which win over answer/explanation labels.
+    """
+    head = LINE_HEAD_RE.match(line)
+    if head is not None and head.lastgroup == 'number':
+        return LINE_QUESTION, head
+    if OPTION_HINT_RE.search(line):
+        return LINE_OPTION, None
+    if head is not None:
+        return head.lastgroup, head
+    return LINE_TEXT, None
+
+
+class _ParagraphRef:
+    """Position of a parsed line inside its source paragraph."""
+
+    __slots__ = ('index', 'text', 'para_runs', 'start', '_offsets')
+
+    def __init__(self, index, text, para_runs, start):
+        self.index = index
+        self.text = text
+        self.para_runs = para_runs
+        self.start = start
+        self._offsets = None
+
+    def runs(self, start, end):
+        """
+        Returns the rich runs for line[start:end].
+
+        Paragraphs whose runs do not spell out the same text as the plain
+        extraction (e.g. runs with several w:t) have no usable runs.
+        """
+        if self._offsets is None:
+            if self.para_runs and rich_text_to_plain(self.para_runs) == self.text:
+                self._offsets = run_offsets(self.para_runs)
+            else:
+                self._offsets = []
+        if not self._offsets:
+            return []
+        return slice_runs(self.para_runs, self.start + start, self.start + end, self._offsets)
+
 class QuizParser:
-    def __init__(self):
+    def __init__(self, streaming=None, timer=None):
         self.questions = []
+        # None: decide per document from STREAMING_THRESHOLD; True/False forces a mode
+        self.streaming = streaming
+        # StageTimer for per-stage timings (see instrument.py)
+        self.timer = timer or NULL_TIMER
 
-    def get_docx_text(self, path):
-        """Extracts text from a docx file using zipfile/xml approach."""
-        if not os.path.exists(path):
-            return ""
+    def _extract_paragraph(self, p):
+        """Walks the runs of one w:p element and returns (plain_text, rich_runs)."""
+        texts = [node.text for node in p.iter(W_T) if node.text]
+        para_runs = []
+
+        for run in p.iter(W_R):
+            # Rich text keeps only the first w:t of each run
+            t_elem = run.find('.//' + W_T)
+            if t_elem is None or not t_elem.text:
+                continue
+
+            # Extract formatting properties
+            rPr = run.find('.//' + W_RPR)
+            formatting = {
+                'bold': False,
+                'italic': False,
+                'underline': False,
+                'emphasis': None  # For 着重号
+            }
+
+            if rPr is not None:
+                if rPr.find('.//' + W_B) is not None:
+                    formatting['bold'] = True
+                if rPr.find('.//' + W_I) is not None:
+                    formatting['italic'] = True
+                if rPr.find('.//' + W_U) is not None:
+                    formatting['underline'] = True
+
+                # Check for emphasis marks (着重号)
+                em_elem = rPr.find('.//' + W_EM)
+                if em_elem is not None:
+                    em_val = em_elem.get(W_VAL)
+                    formatting['emphasis'] = em_val if em_val else 'dot'
+
+            para_runs.append({
+                'text': t_elem.text,
+                'format': formatting
+            })
+
+        return ''.join(texts), para_runs
+
+    def _iter_paragraphs(self, path):
+        """
+        Yields (plain_text, rich_runs) for every w:p of the document in order.
+
+        path may be a file path, the docx as bytes, or a binary file-like
+        object (e.g. a Streamlit upload), so nothing has to be written to disk.
+        Small documents are parsed into a DOM; large ones (or all of them when
+        streaming=True) are read with iterparse straight from the zip member.
+        """
+        if isinstance(path, (bytes, bytearray, memoryview)):
+            path = io.BytesIO(path)
+        elif hasattr(path, 'read'):
+            if not (hasattr(path, 'seekable') and path.seekable()):
+                # zipfile needs to seek to the central directory
+                path = io.BytesIO(path.read())
+        elif not os.path.exists(path):
+            return
+
+        with zipfile.ZipFile(path) as document:
+            info = document.getinfo('word/document.xml')
+
+            streaming = self.streaming
+            if streaming is None:
+                streaming = info.file_size >= STREAMING_THRESHOLD
+
+            if streaming:
+                with document.open(info) as stream:
+                    yield from self._iterparse_paragraphs(stream)
+            else:
+                with self.timer.stage(STAGE_ZIP_READ):
+                    data = document.read(info)
+                with self.timer.stage(STAGE_XML_PARSE):
+                    tree = ET.fromstring(data)
+                    paragraphs = [self._extract_paragraph(p) for p in tree.iter(W_P)]
+                yield from paragraphs
+
+    def _iterparse_paragraphs(self, stream):
+        """
+        Streams paragraphs out of document.xml with bounded memory.
+
+        Each direct child of w:body (a paragraph or a whole table) is consumed
+        once it closes and then dropped from the tree, so only one top-level
+        block is ever held in memory. Nested w:p are visited in the same
+        pre-order as tree.iter() on the full DOM. Decompression is timed as
+        part of the XML parse stage, as the two are interleaved.
+        """
+        events = ET.iterparse(stream, events=('start', 'end'))
+        depth = 0
+        body = None
+
+        while True:
+            paragraphs = None
+            with self.timer.stage(STAGE_XML_PARSE):
+                for event, elem in events:
+                    if event == 'start':
+                        depth += 1
+                        if depth == 2:
+                            body = elem
+                        continue
+
+                    depth -= 1
+                    if depth == 2:
+                        paragraphs = [self._extract_paragraph(p) for p in elem.iter(W_P)]
+                        elem.clear()
+                        body.remove(elem)
+                        break
+            if paragraphs is None:
+                return
+            yield from paragraphs
+
+    def get_docx_content(self, path):
+        """
+        Reads the docx once and returns (text, rich_paragraphs).
+
+        The archive is opened and document.xml is parsed a single time; each
+        w:p is walked once to produce both the plain text line and its runs.
+        """
+        text_content = []
+        paragraphs = []
 
         try:
-            document = zipfile.ZipFile(path)
-            xml_content = document.read('word/document.xml')
-            document.close()
-        except Exception:
-            return ""
-        
-        try:
-            tree = ET.fromstring(xml_content)
+            for text, para_runs in self._iter_paragraphs(path):
+                text_content.append(text)
+                paragraphs.append(para_runs)
         except Exception:
-            return ""
-        
-        ns = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-        text_content = []
-        
-        for p in tree.findall('.//w:p', ns):
-            texts = [node.text for node in p.findall('.//w:t', ns) if node.text]
-            if texts:
-                text_content.append(''.join(texts))
-            else:
-                text_content.append('')
-                
-        return '\n'.join(text_content)
-    
+            return "", []
+
+        return '\n'.join(text_content), paragraphs
+
+    def get_docx_text(self, path):
+        """Extracts text from a docx file using zipfile/xml approach."""
+        return self.get_docx_content(path)[0]
+
     def get_docx_rich_text(self, path):
         """Extracts text with formatting metadata from a docx file."""
-        if not os.path.exists(path):
-            return []
+        return self.get_docx_content(path)[1]
 
-        try:
-            document = zipfile.ZipFile(path)
-            xml_content = document.read('word/document.xml')
-            document.close()
-        except Exception:
-            return []
-        
-        try:
-            tree = ET.fromstring(xml_content)
-        except Exception:
-            return []
-        
-        ns = {
-            'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
-            'm': 'http://schemas.openxmlformats.org/officeDocument/2006/math'
-        }
-        
-        paragraphs = []
-        
-        for p in tree.findall('.//w:p', ns):
-            para_runs = []
-            
-            # Process each run (formatted text segment)
-            for run in p.findall('.//w:r', ns):
-                # Get text content
-                t_elem = run.find('.//w:t', ns)
-                if t_elem is None or not t_elem.text:
-                    continue
-                
-                text = t_elem.text
-                
-                # Extract formatting properties
-                rPr = run.find('.//w:rPr', ns)
-                formatting = {
-                    'bold': False,
-                    'italic': False,
-                    'underline': False,
-                    'emphasis': None  # For 着重号
-                }
-                
-                if rPr is not None:
-                    # Check for bold
-                    if rPr.find('.//w:b', ns) is not None:
-                        formatting['bold'] = True
-                    
-                    # Check for italic
-                    if rPr.find('.//w:i', ns) is not None:
-                        formatting['italic'] = True
-                    
-                    # Check for underline
-                    u_elem = rPr.find('.//w:u', ns)
-                    if u_elem is not None:
-                        formatting['underline'] = True
-                    
-                    # Check for emphasis marks (着重号)
-                    em_elem = rPr.find('.//w:em', ns)
-                    if em_elem is not None:
-                        em_val = em_elem.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val')
-                        formatting['emphasis'] = em_val if em_val else 'dot'
-                
-                para_runs.append({
-                    'text': text,
-                    'format': formatting
-                })
-            
-            paragraphs.append(para_runs)
-        
-        return paragraphs
+    def _iter_lines(self, file_path):
+        """
+        Yields (line, paragraph_ref) for every non-empty stripped line.
+
+        Lines are produced straight from the paragraph stream; the ref knows
+        the paragraph index and where the stripped line starts inside it, so
+        rich runs are sliced by offset instead of being looked up by text.
+        A document that fails to read raises from where the damage is.
+        """
+        para_index = -1
+        for para_index, (text, para_runs) in enumerate(self._iter_paragraphs(file_path)):
+            offset = 0
+            for raw_line in text.split('\n'):
+                line = raw_line.strip()
+                if line:
+                    start = offset + len(raw_line) - len(raw_line.lstrip())
+                    yield line, _ParagraphRef(para_index, text, para_runs, start)
+                offset += len(raw_line) + 1
+
+        logger.debug("提取到 %d 个富文本段落", para_index + 1)
 
     def parse(self, file_path):
-        """Parses the docx file and returns a list of question dictionaries."""
-        content = self.get_docx_text(file_path)
-        lines = content.split('\n')
-        
-        # Also get rich text for formatting support
-        rich_paragraphs = self.get_docx_rich_text(file_path)
-        print(f"[DEBUG] 提取到 {len(rich_paragraphs)} 个富文本段落")
-        
-        # Create mapping from line text to rich text runs
-        rich_text_map = {}
-        for para_runs in rich_paragraphs:
-            if para_runs:
-                line_text = ''.join([r['text'] for r in para_runs])
-                rich_text_map[line_text.strip()] = para_runs
-        
-        print(f"[DEBUG] 富文本映射表包含 {len(rich_text_map)} 条记录")
+        """
+        Parses the docx and returns a list of question dictionaries.
+
+        file_path may also be the docx bytes or a binary file-like object.
+        A document that cannot be read (see DOCX_READ_ERRORS) gives no
+        questions, in DOM and streaming mode alike: a stream that breaks
+        halfway does not leave a partial paper.
+        """
+        try:
+            for _ in self.iter_questions(file_path):
+                pass
+        except DOCX_READ_ERRORS as e:
+            logger.warning("文档无法读取，未提取试题: %s: %s", type(e).__name__, e)
+            self.questions = []
+        return self.questions
+
+    def iter_questions(self, file_path):
+        """
+        Yields question dictionaries one at a time.
+
+        A question is yielded as soon as its block (stem, options, answer and
+        explanation) is closed by the next question or the end of the document,
+        so rendering can start before the whole paper is parsed. Yielded
+        questions are also collected in self.questions. A document that
+        cannot be read raises one of DOCX_READ_ERRORS, in streaming mode
+        possibly after the questions before the damage were yielded.
+        """
         self.questions = []
         current_q = {}
-        
-        # Regex Patterns
-        q_start = re.compile(r'^(\d+)\.\s*(.*)')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # 1. Detect start of a Question
-            q_match = q_start.match(line)
-            if q_match:
+
+        for line, para in self._iter_lines(file_path):
+            with self.timer.stage(STAGE_CLASSIFY):
+                next_q = self._read_line(current_q, line, para)
+            # A new question closes the current one
+            if next_q is not current_q:
                 if current_q:
                     self.questions.append(current_q)
-                
-                q_num = q_match.group(1)
-                q_text = line
-                
-                # Check for inline answer in previous format (e.g. ".... ( B )")
-                # We want to extract "B" and normalize the brackets to "（   ）"
-                # Regex for inline answer: "（\s*([A-D])\s*）" or parens
-                inline_ans_match = re.search(r'[（\(]\s*([A-D])\s*[）\)]', q_text)
-                
-                inline_answer = None
-                if inline_ans_match:
-                    inline_answer = inline_ans_match.group(1)
-                    # Normalize to empty brackets for the "Question" slide
-                    q_text = re.sub(r'[（\(]\s*[A-D]\s*[）\)]', '（   ）', q_text)
-                else:
-                    # Normalize empty brackets or placeholders
-                    # 1. Replace Underscores at end of line (______ -> （   ）)
-                    # Use regex to find underscores at the end, allowing for punctuation like period/question mark?
-                    # Usually fill-in-blanks are straight underscores.
-                    if '_' in q_text:
-                        # Replace sequence of 2 or more underscores with brackets
-                        q_text = re.sub(r'_{2,}', '（   ）', q_text)
-                    
-                    # 2. Normalize existing brackets
-                    q_text = re.sub(r'（\s*）', '（   ）', q_text)
-                    
-                    # 3. Fallback: if no brackets and no underscores (and it's a choice question), append brackets?
-                    # The prompt implies "If it ends with underscore, force convert".
-                    # Let's check if it still has no brackets.
-                    if '（' not in q_text and '(' not in q_text:
-                         q_text += '（   ）'
-
-                current_q = {
-                    'number': q_num,
-                    'question': q_text,
-                    'question_rich': rich_text_map.get(q_text.strip(), []),
-                    'real_answer': inline_answer,
-                    'options': [],
-                    'options_rich': [],
-                    'explanation': '',
-                    'explanation_rich': []
-                }
-                
-                # Debug: check if rich text was found
-                if current_q['question_rich']:
-                    print(f"[DEBUG] 题目 {q_num} 找到富文本: {len(current_q['question_rich'])} 个片段")
-                else:
-                    print(f"[DEBUG] 题目 {q_num} 未找到富文本匹配")
-                continue
-            
-            # 2. Detect Options
-            # Pattern: Starts with A. or contains A. B. C. D.
-            # Fix: Must also detect lines starting with B., C., D. if split across lines
-            if re.search(r'(?:^|\s)[A-D]\.', line) and current_q:
-                # STRATEGY: Find all [A-D]. markers and split.
-                # Simplified Regex: Just look for Letter + Dot.
-                # We assume that in a "Options" line, A. B. C. D. are markers.
-                # Risk: "This is A. grade" might trigger.
-                # Mitigation: We expect A, B, C, D to be present roughly in order or count.
-                
-                pattern = re.compile(r'([A-D])\.')
-                matches = list(pattern.finditer(line))
-                
-                # Filter matches?
-                # If we found matches, check if they are likely options.
-                # E.g. we expect A. to be first? 
-                # For now let's just trust them.
-                
-                if matches:
-                    # Logic to slice string
-                    for i, match in enumerate(matches):
-                        # Start of this option content is:
-                        # match start + 2 (len of "X.")
-                        # BUT we want to include the label "A." in the option string for the renderer to show?
-                        # The renderer typically shows what we give it.
-                        # Previous logic included "A.".
-                        
-                        start = match.start(0) # Start of "A."
-                        
-                        # End is start of next match
-                        if i + 1 < len(matches):
-                            end = matches[i+1].start(0)
-                        else:
-                            end = len(line)
-                            
-                        opt = line[start:end].strip()
-                        opt = re.sub(r'\s+', ' ', opt).strip()
-                        current_q['options'].append(opt)
-                        # Try to find rich text for this option
-                        current_q['options_rich'].append(rich_text_map.get(opt.strip(), []))
-                continue
-                
-            # 3. Detect Explicit Answer Line
-            # Supports: 【答案】B, 答案：B, Answer: B
-            if (line.startswith('【答案】') or line.startswith('答案：') or line.startswith('Answer:')) and current_q:
-                # Remove label
-                ans_text = re.sub(r'^(【答案】|答案：|Answer:)\s*', '', line).strip()
-                # Extract just the letter A-D
-                ans_char_match = re.search(r'[A-D]', ans_text)
-                if ans_char_match:
-                     current_q['real_answer'] = ans_char_match.group(0)
-                continue
-                
-            # 4. Detect Explanation Line
-            # Supports: 【解析】..., 解析：..., Explanation:...
-            if (line.startswith('解析') or line.startswith('【解析】') or line.startswith('Explanation')) and current_q:
-                # Remove label
-                raw_expl = re.sub(r'^(【解析】|解析：|解析:|Explanation:?)\s*', '', line).strip()
-                
-                # Tag Cleaning 
-                # Remove 【...】 tags inside explanation (e.g. 【分析】)
-                cleaned_expl = re.sub(r'【[^】]*】', '', raw_expl)
-                
-                # Append to explanation
-                if current_q['explanation']:
-                    current_q['explanation'] += "\n" + cleaned_expl.strip()
-                else:
-                    current_q['explanation'] = cleaned_expl.strip()
-                    # Try to find rich text for explanation
-                    current_q['explanation_rich'] = rich_text_map.get(cleaned_expl.strip(), [])
-                continue
-            
-            # 5. Fallback: Append generic text to explanation if we are in explanation mode? 
-            # Or maybe just append to question if it's multiline?
-            # For now, let's assume single line questions/options/answers for simplicity
-            # unless we detect we are "inside" explanation.
-            if current_q and current_q.get('explanation'):
-                 # If we already started explanation, assume following lines are part of it
-                 # until next question starts (handled by line 50)
-                 current_q['explanation'] += "\n" + line.strip()
+                    yield current_q
+                current_q = next_q
 
         if current_q:
             self.questions.append(current_q)
-            
-        return self.questions
+            yield current_q
+
+    def _read_line(self, current_q, line, para):
+        """
+        Applies one line to the question being built.
+
+        Returns current_q, or a new question dict when the line starts one.
+        """
+        kind, head = classify_line(line)
+
+        # 1. Start of a Question
+        if kind == LINE_QUESTION:
+            q_num = head.group('number')
+            q_text = line
+
+            # Inline answer in the stem (e.g. ".... ( B )"): extract "B" and
+            # normalize the brackets to "（   ）" for the "Question" slide
+            # The same edits are mirrored on the runs so formatting survives
+            q_rich = para.runs(0, len(line))
+            inline_ans_match = INLINE_ANSWER_RE.search(q_text)
+
+            inline_answer = None
+            if inline_ans_match:
+                inline_answer = inline_ans_match.group(1)
+                q_text = INLINE_ANSWER_RE.sub(BLANK, q_text)
+                q_rich = sub_runs(INLINE_ANSWER_RE, BLANK, q_rich)
+            else:
+                # Normalize empty brackets or placeholders
+                # 1. Replace sequences of 2 or more underscores (______ -> （   ）)
+                if '_' in q_text:
+                    q_text = UNDERSCORE_BLANK_RE.sub(BLANK, q_text)
+                    q_rich = sub_runs(UNDERSCORE_BLANK_RE, BLANK, q_rich)
+
+                # 2. Normalize existing brackets
+                q_text = EMPTY_BRACKET_RE.sub(BLANK, q_text)
+                q_rich = sub_runs(EMPTY_BRACKET_RE, BLANK, q_rich)
+
+                # 3. Fallback: no brackets at all, append an empty answer slot
+                if '（' not in q_text and '(' not in q_text:
+                     q_text += BLANK
+                     if q_rich:
+                         q_rich = q_rich + plain_to_rich(BLANK)
+
+            current_q = {
+                'number': q_num,
+                'question': q_text,
+                'question_rich': q_rich,
+                'real_answer': inline_answer,
+                'options': [],
+                'options_rich': [],
+                'explanation': '',
+                'explanation_rich': []
+            }
+
+            # Debug: check if rich text was found
+            if q_rich:
+                logger.debug("题目 %s 找到富文本: %d 个片段", q_num, len(q_rich))
+            else:
+                logger.debug("题目 %s 未找到富文本匹配", q_num)
+            return current_q
+
+        # Everything else belongs to the current question
+        if not current_q:
+            return current_q
+
+        # 2. Options: split the line at every "A." .. "D." marker.
+        # Risk: "This is A. grade" might trigger; the label stays in the option text.
+        if kind == LINE_OPTION:
+            matches = list(OPTION_LABEL_RE.finditer(line))
+            for i, match in enumerate(matches):
+                start = match.start(0)
+                end = matches[i + 1].start(0) if i + 1 < len(matches) else len(line)
+
+                opt = line[start:end].strip()
+                opt = WHITESPACE_RE.sub(' ', opt).strip()
+                current_q['options'].append(opt)
+                opt_rich = strip_runs(para.runs(start, end))
+                current_q['options_rich'].append(sub_runs(WHITESPACE_RE, ' ', opt_rich))
+            return current_q
+
+        # 3. Explicit answer line: 【答案】B, 答案：B, Answer: B
+        if kind == LINE_ANSWER:
+            ans_text = line[head.end():].strip()
+            ans_char_match = ANSWER_LETTER_RE.search(ans_text)
+            if ans_char_match:
+                 current_q['real_answer'] = ans_char_match.group(0)
+            return current_q
+
+        # 4. Explanation line: 【解析】..., 解析：..., Explanation:...
+        if kind == LINE_EXPLANATION:
+            label_end = 0 if head.group() == '解析' else head.end()
+            raw_expl = line[label_end:].strip()
+
+            cleaned_expl = EXPLANATION_TAG_RE.sub('', raw_expl)
+
+            # Append to explanation
+            if current_q['explanation']:
+                current_q['explanation'] += "\n" + cleaned_expl.strip()
+            else:
+                current_q['explanation'] = cleaned_expl.strip()
+                expl_rich = sub_runs(EXPLANATION_TAG_RE, '', para.runs(label_end, len(line)))
+                current_q['explanation_rich'] = strip_runs(expl_rich)
+            return current_q
+
+        # 5. Continuation: once an explanation has started, following lines
+        # belong to it until the next question starts
+        if current_q.get('explanation'):
+             current_q['explanation'] += "\n" + line
+        return current_q
 
     def infer_subject(self):
         """Infers the academic subject based on keywords in parsed questions."""
+        with self.timer.stage(STAGE_SUBJECT):
+            return self._infer_subject()
+
+    def _infer_subject(self):
         if not self.questions:
             return "通用试题"
 
-        subject_keywords = {
-            "语文": ["语", "文言文", "阅读理解", "拼音", "字词", "修辞", "古诗", "成语", "散文", "鲁迅", "唐诗", "宋词"],
-            "数学": ["算", "方程", "几何", "函数", "导数", "概率", "数值", "三角", "面积", "体积", "周长", "等差", "数列"],
-            "物理": ["力", "电", "磁", "光", "运动", "速度", "加速度", "功", "能量", "压强", "浮力", "电路", "透镜"],
-            "化学": ["化学", "反应", "分子", "原子", "元素", "氧化", "还原", "酸", "碱", "盐", "溶液", "方程式"],
-            "生物": ["细胞", "基因", "生物", "植物", "动物", "进化", "遗传", "光合", "呼吸", "系统", "消化"],
-            "英语": ["the", "of", "and", "a", "to", "in", "is", "you", "that", "it", "he", "was", "for", "on", "are"],
-            "地理": ["地图", "经纬", "气候", "地形", "板块", "河流", "人口", "农业", "工业", "资源"],
-            "历史": ["历史", "朝代", "皇帝", "事件", "革命", "近代", "古代", "文明", "遗址", "条约"],
-            "政治": ["政治", "法律", "公民", "国家", "党", "建设", "发展", "社会", "价值", "思想"]
-        }
-
-        # Collect all text
-        all_text = ""
+        # Same text as the old all_text concatenation (stem, " ", explanation,
+        # each option + " "), scanned in blocks of questions so the leader can
+        # be declared before the end of a large paper. No keyword spans two
+        # blocks: every stem starts with its question number.
+        chunks = []
         for q in self.questions:
-            all_text += q.get('question', '') + " " + q.get('explanation', '')
+            chunk = q.get('question', '') + " " + q.get('explanation', '')
             for opt in q.get('options', []):
-                all_text += opt + " "
-        
-        all_text = all_text.lower()
-        
-        # Count scores per subject
-        scores = {subj: 0 for subj in subject_keywords}
-        for subj, keywords in subject_keywords.items():
-            for kw in keywords:
-                if kw in all_text:
-                    scores[subj] += all_text.count(kw)
-        
-        # Special check for English (count Latin characters if word density is high)
-        import re
-        latin_chars = len(re.findall(r'[a-zA-Z]', all_text))
-        total_chars = len(all_text)
-        if total_chars > 0 and (latin_chars / total_chars) > 0.4:
-            scores["英语"] += 100 # High probability
+                chunk += opt + " "
+            chunks.append(chunk)
+
+        hits = Counter()
+        exact_counts = Counter()
+        latin_chars = 0
+        total_chars = sum(len(chunk) for chunk in chunks)
+        remaining = total_chars
+
+        for start in range(0, len(chunks), SUBJECT_SCAN_BLOCK):
+            block = ''.join(chunks[start:start + SUBJECT_SCAN_BLOCK]).lower()
+            remaining -= len(block)
+
+            # One scan finds every keyword occurrence in the block
+            hits.update(KEYWORD_SCAN_RE.findall(block))
+            for kw, _ in SELF_OVERLAPPING_KEYWORDS:
+                exact_counts[kw] += block.count(kw)
+            latin_chars += len(LATIN_RE.findall(block))
+
+            scores = self._keyword_scores(hits, exact_counts)
+            if remaining and self._lead_is_final(scores, remaining):
+                break
+        else:
+            # Special check for English (count Latin characters if word density is high)
+            if total_chars > 0 and (latin_chars / total_chars) > 0.4:
+                scores["英语"] += 100 # High probability
 
         # Find best match
         best_subject = "通用"
@@ -326,5 +583,38 @@ class QuizParser:
             if score > max_score:
                 max_score = score
                 best_subject = subj
-        
+
         return best_subject
+
+    @staticmethod
+    def _keyword_scores(hits, exact_counts):
+        """Turns scanner hits and str.count() tallies into per-subject scores."""
+        scores = dict.fromkeys(SUBJECT_KEYWORDS, 0)
+        for kw, count in hits.items():
+            for subj, weight in KEYWORD_SCORES[kw]:
+                scores[subj] += count * weight
+        for kw, subjects in SELF_OVERLAPPING_KEYWORDS:
+            for subj in subjects:
+                scores[subj] += exact_counts[kw]
+        return scores
+
+    @staticmethod
+    def _lead_is_final(scores, remaining):
+        """
+        True once no other subject can catch the leader in the remaining text.
+
+        Each remaining character can add at most MAX_HITS_PER_CHAR[subj] to a
+        subject, and English can still gain the Latin-density bonus.
+        """
+        leader = max(scores, key=scores.get)
+        lead_score = scores[leader]
+        if lead_score == 0:
+            return False
+        for subj, score in scores.items():
+            if subj == leader:
+                continue
+            reachable = score + remaining * MAX_HITS_PER_CHAR[subj] + (100 if subj == "英语" else 0)
+            # Ties go to the subject listed first, so only a strict lead is final
+            if reachable >= lead_score:
+                return False
+        return True
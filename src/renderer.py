@@ -1,22 +1,62 @@
-# VERSION: 1.0.2 (Fixed Float Inches)
+# VERSION: 1.2.0 (Pre-rendered Theme Backgrounds)
+import io
+import itertools
+import logging
 import os
-from pptx import Presentation
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
 
 from pptx.util import Inches, Pt, Cm
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_AUTO_SIZE
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.enum.dml import MSO_LINE
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
 from pptx.oxml.xmlchemy import OxmlElement
+from pptx.parts.image import ImagePart
+from pptx.parts.slide import SlidePart
+from pptx.shapes.shapetree import SlideShapes
 
 # Rich text support
 from .rich_text_utils import apply_rich_text_formatting, has_rich_text
+# PIL measurement engine (cached fonts and results)
+from .text_metrics import get_measurer, measure_text_exact
+# Template and fonts shared by all renderers in the process
+from .assets import LOGO_PATH, asset_image, blob_image, new_presentation
+# Theme decorations baked into one background image
+from .backgrounds import background_png, background_style
+# Per-stage timings
+from .instrument import NULL_TIMER, STAGE_MEASURE, STAGE_SAVE, STAGE_SHAPES
+# Reveal modes (defined without python-pptx for the entry points)
+from .options import REVEAL_ANIMATE, REVEAL_MODES, REVEAL_SLIDES
+# Deflate level and post-save size optimization
+from .optimize import DEFAULT_IMAGE_DPI, OPTIMIZE_COMPRESS_LEVEL, optimize_pptx, write_presentation
+# Slides written to the output as they are finished
+from .streaming import PptxStream
+
+logger = logging.getLogger(__name__)
+
+# Questions handed to a worker per task; small enough to balance, large enough to amortize pickling
+PARALLEL_CHUNK_SIZE = 8
+
+# Click animation effects (PowerPoint preset classes of Appear / Disappear)
+ANIM_ENTRANCE = 'entr'
+ANIM_EXIT = 'exit'
 
 class QuizRenderer:
-    def __init__(self, output_file='quiz_presentation.pptx', subject="通用"):
+    def __init__(self, output_file='quiz_presentation.pptx', subject="通用", timer=None,
+                 reveal=REVEAL_SLIDES):
+        if reveal not in REVEAL_MODES:
+            raise ValueError(f"reveal must be one of {REVEAL_MODES}, not {reveal!r}")
         self.output_file = output_file
-        self.prs = Presentation()
+        self.prs = new_presentation()
         self.subject = subject
+        self.reveal = reveal
+        # StageTimer for per-stage timings (see instrument.py)
+        self.timer = timer or NULL_TIMER
         
         # --- Default Design Tokens ---
         self.BG_COLOR = RGBColor(241, 245, 249) # #f1f5f9
@@ -40,6 +80,17 @@ class QuizRenderer:
         self.prs.slide_width = self.SLIDE_WIDTH
         self.prs.slide_height = self.SLIDE_HEIGHT
 
+        # Themed layout holding the background, card and logo; built on first use
+        self._chrome_layout = None
+        self._next_slide_id = None
+        # Image parts of this presentation by image SHA1
+        self._image_parts = {}
+        # optimize_pptx report of the last optimized save
+        self.size_report = None
+        # Output stream (see stream_to) and the slide rIds not yet written to it
+        self._stream = None
+        self._unwritten_slides = []
+
     def _apply_theme(self):
         """Sets color tokens based on the subject."""
         themes = {
@@ -66,87 +117,101 @@ class QuizRenderer:
                 max(0, theme["bg"][2] - 10)
             )
 
+    def _get_chrome_layout(self):
+        """
+        Returns the themed slide layout every slide is based on.
+
+        The background, decorations, card and logo are drawn once into the
+        Blank layout instead of onto each slide, so slides only carry their
+        own content.
+        """
+        if self._chrome_layout is None:
+            layout = self.prs.slide_layouts[6] # Blank
+            layout._element.cSld.set('name', f"Quiz {self.subject}")
+            # Layout shape trees are read-only in python-pptx; SlideShapes adds to any spTree
+            shapes = SlideShapes(layout.shapes._spTree, layout)
+            self._set_bg(layout)
+            self._add_card_container(shapes)
+            self._add_logo(shapes)
+            self._chrome_layout = layout
+        return self._chrome_layout
+
+    def _new_slide(self):
+        """
+        Appends an empty slide on the chrome layout.
+
+        Same result as prs.slides.add_slide for a layout without content
+        placeholders, minus the scans over every existing slide relationship
+        and slide id that make add_slide quadratic in deck size.
+        """
+        layout = self._get_chrome_layout()
+        prs_part = self.prs.part
+        sld_id_lst = self.prs.slides._sldIdLst
+        if self._next_slide_id is None:
+            self._next_slide_id = max([255] + [int(sld_id.id) for sld_id in sld_id_lst]) + 1
+
+        slide_part = SlidePart.new(prs_part._next_slide_partname, prs_part.package, layout.part)
+        rId = prs_part.rels._add_relationship(RT.SLIDE, slide_part)
+        sld_id_lst._add_sldId(id=self._next_slide_id, rId=rId)
+        self._next_slide_id += 1
+        if self._stream is not None:
+            self._unwritten_slides.append(rId)
+        return slide_part.slide
+
+    def stream_to(self, file=None, compress_level=None):
+        """
+        Streams the deck to file (a path or writable binary file-like object;
+        defaults to output_file) with compress_level (0-9, None for the
+        default) instead of keeping it in memory until save().
+
+        From here on each question's slides are written out and released as
+        soon as they are finished, slides added earlier with them; save()
+        then writes the presentation-level parts and closes the file. Slides
+        must not be touched once written. When the page total is unknown
+        (an iterable without total), slides are held until the last question
+        fills in the page numbers.
+        """
+        self._stream = PptxStream(self.prs, file if file is not None else self.output_file, compress_level)
+        self._unwritten_slides = [sld_id.rId for sld_id in self.prs.slides._sldIdLst]
+
+    def discard_stream(self):
+        """Abandons a stream_to output: closes it and removes a file written by path."""
+        if self._stream is not None:
+            self._stream.discard()
+            self._stream = None
+
+    def _write_finished_slides(self):
+        """Writes the slides built since the last call to the stream, if streaming."""
+        if self._stream is None or not self._unwritten_slides:
+            return
+        with self.timer.stage(STAGE_SAVE):
+            for rId in self._unwritten_slides:
+                self._stream.write_slide(rId)
+        self._unwritten_slides = []
+
     def _set_bg(self, slide):
-        """Sets the slide background color and adds decorative 'Canvas-style' elements."""
+        """
+        Sets the slide background: the theme colour, or for decorated themes
+        the colour and 'Canvas-style' decorations pre-rendered into one image.
+        """
         background = slide.background
         fill = background.fill
         fill.solid()
         fill.fore_color.rgb = self.BG_COLOR
-        
-        # Add decorative shapes based on subject (simulating Canvas)
-        if self.subject in ["数学", "物理", "化学"]:
-            # Tech Grid / Geometry
-            for i in range(15):
-                line_w = self.SLIDE_WIDTH / 15
-                shape = slide.shapes.add_shape(
-                    MSO_SHAPE.RECTANGLE, 
-                    i * line_w, 0, Inches(0.01), self.SLIDE_HEIGHT
-                )
-                shape.fill.solid()
-                shape.fill.fore_color.rgb = self.ACCENT_COLOR
-                shape.fill.fore_color.brightness = 0.85
-                shape.line.visible = False
-        
-        elif self.subject in ["生物", "地理"]:
-            # Organic Circles
-            import random
-            random.seed(42) # Deterministic for this slide
-            for _ in range(8):
-                size = Inches(random.uniform(1.5, 4))
-                # Generate x, y carefully
-                x_pos = random.uniform(0, 13) * 914400
-                y_pos = random.uniform(0, 7) * 914400
-                shape = slide.shapes.add_shape(
-                    MSO_SHAPE.OVAL,
-                    int(x_pos), int(y_pos), size, size
-                )
-                shape.fill.solid()
-                shape.fill.fore_color.rgb = self.ACCENT_COLOR
-                shape.fill.fore_color.brightness = 0.92
-                shape.line.visible = False
-
-        elif self.subject in ["语文", "历史"]:
-            # Enhanced Vintage/Humanities Border (Canva-inspired)
-            margin = Inches(0.2)
-            
-            # Outer decorative border
-            outer = slide.shapes.add_shape(
-                MSO_SHAPE.RECTANGLE,
-                margin, margin, 
-                self.SLIDE_WIDTH - 2*margin, 
-                self.SLIDE_HEIGHT - 2*margin
-            )
-            outer.fill.background()
-            outer.line.color.rgb = self.ACCENT_DARK
-            outer.line.width = Pt(3)
-            
-            # Inner accent line
-            inner_margin = Inches(0.25)
-            inner = slide.shapes.add_shape(
-                MSO_SHAPE.RECTANGLE,
-                inner_margin, inner_margin,
-                self.SLIDE_WIDTH - 2*inner_margin,
-                self.SLIDE_HEIGHT - 2*inner_margin
-            )
-            inner.fill.background()
-            inner.line.color.rgb = self.ACCENT_COLOR
-            inner.line.width = Pt(1)
-            
-            # Corner decorations (small accent rectangles)
-            corner_size = Inches(0.15)
-            corner_positions = [
-                (margin, margin),  # Top-left
-                (self.SLIDE_WIDTH - margin - corner_size, margin),  # Top-right
-                (margin, self.SLIDE_HEIGHT - margin - corner_size),  # Bottom-left
-                (self.SLIDE_WIDTH - margin - corner_size, self.SLIDE_HEIGHT - margin - corner_size)  # Bottom-right
-            ]
-            for x, y in corner_positions:
-                corner = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, x, y, corner_size, corner_size)
-                corner.fill.solid()
-                corner.fill.fore_color.rgb = self.ACCENT_DARK
-                corner.line.visible = False
-
-    def _add_card_container(self, slide):
+
+        style = background_style(self.subject)
+        if style is None:
+            return
+        png = background_png(
+            style, tuple(self.BG_COLOR), tuple(self.ACCENT_COLOR), tuple(self.ACCENT_DARK),
+            self.SLIDE_WIDTH / 914400, self.SLIDE_HEIGHT / 914400,
+        )
+        _, rId = self._relate_image(slide.part, blob_image(png, "background.png"))
+        blip_fill = slide._element.cSld.get_or_add_bgPr().get_or_change_to_blipFill()
+        blip_fill.append(parse_xml(f'<a:blip {nsdecls("a", "r")} r:embed="{rId}"/>'))
+        blip_fill.append(parse_xml(f'<a:stretch {nsdecls("a")}><a:fillRect/></a:stretch>'))
+
+    def _add_card_container(self, shapes):
         """Adds the white card with shadow and top bar."""
         # 1. Main Card
         # Approx 1280x720 in CSS inside a larger margin. 
@@ -156,7 +221,7 @@ class QuizRenderer:
         width = self.SLIDE_WIDTH - (margin_x * 2)
         height = self.SLIDE_HEIGHT - (margin_y * 2)
         
-        shape = slide.shapes.add_shape(
+        shape = shapes.add_shape(
             MSO_SHAPE.ROUNDED_RECTANGLE, 
             margin_x, margin_y, width, height
         )
@@ -168,7 +233,7 @@ class QuizRenderer:
         # 2. Top Gradient Bar (Simulated with Solid Blue for now or shape)
         # Position: Absolute top of card
         bar_height = Inches(0.15)
-        bar = slide.shapes.add_shape(
+        bar = shapes.add_shape(
             MSO_SHAPE.RECTANGLE,
             margin_x, margin_y, width, bar_height
         )
@@ -178,7 +243,7 @@ class QuizRenderer:
         
         # 3. Bottom Right Accent Circle (Decorative)
         circle_size = Inches(3)
-        circle = slide.shapes.add_shape(
+        circle = shapes.add_shape(
             MSO_SHAPE.OVAL,
             self.SLIDE_WIDTH + Inches(0.5), self.SLIDE_HEIGHT + Inches(0.5), # Off canvas? No, clip
             circle_size, circle_size
@@ -189,7 +254,7 @@ class QuizRenderer:
         # Let's place it inside the card area at bottom right?
         c_left = self.SLIDE_WIDTH - margin_x - Inches(2)
         c_top = self.SLIDE_HEIGHT - margin_y - Inches(2)
-        circle = slide.shapes.add_shape(MSO_SHAPE.OVAL, c_left, c_top, Inches(4), Inches(4))
+        circle = shapes.add_shape(MSO_SHAPE.OVAL, c_left, c_top, Inches(4), Inches(4))
         circle.fill.solid()
         circle.fill.fore_color.rgb = self.ACCENT_COLOR
         # Transparency hack via OXML later if needed. For now 100% solid might be too strong.
@@ -203,7 +268,7 @@ class QuizRenderer:
         # srgbClr = solidFill.srgbClr
         # srgbClr.append(OxmlElement('a:alpha', val="10000")) # 10%
         # This crashes sometimes depending on version. Simpler: skip for now or use light gray.
-        slide.shapes._spTree.remove(circle._element) # Remove it, clean design preferred.
+        shapes._spTree.remove(circle._element) # Remove it, clean design preferred.
 
     def _add_page_num(self, slide, num, total):
         # Bottom right corner - Page number (matching reference image)
@@ -224,32 +289,44 @@ class QuizRenderer:
         run_num.font.size = Pt(16)
         run_num.font.color.rgb = self.TEXT_LIGHT
         run_num.font.bold = False
+        return run_num
 
-    def _add_logo(self, slide):
-        """Adds the circular logo to the top left."""
-        # renderer.py is in 'src', assets is in root.
-        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        logo_path = os.path.join(root_dir, "assets", "logo_circle.png")
-        
-        if os.path.exists(logo_path):
-            # Bottom-left corner positioning with symmetric margin (0.5 inches)
-            size = Inches(0.8)
-            margin = Inches(0.5)
-            left = margin
-            bottom = self.SLIDE_HEIGHT - Inches(0.9)
-            pic = slide.shapes.add_picture(logo_path, left, bottom, width=size)
-            # Add hyperlink
-            pic.click_action.target_full_uri = "https://www.jxgqc.online"
-        else:
-            # For debug: we can print to console if file missing
-            # print(f"DEBUG: Logo not found at {logo_path}")
-            pass
+    def _relate_image(self, part, image):
+        """
+        Returns (image_part, rId) for a shared assets Image shown on part.
+
+        Unlike part.get_or_add_image_part, this neither reads nor hashes the
+        image again, nor scans the package for an image part with its SHA1.
+        """
+        image_part = self._image_parts.get(image.sha1)
+        if image_part is None:
+            image_part = ImagePart.new(self.prs.part.package, image)
+            self._image_parts[image.sha1] = image_part
+        return image_part, part.relate_to(image_part, RT.IMAGE)
+
+    def _add_picture(self, shapes, image, left, top, width=None, height=None):
+        """shapes.add_picture for a shared assets Image."""
+        image_part, rId = self._relate_image(shapes.part, image)
+        pic = shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+        shapes._recalculate_extents()
+        return shapes._shape_factory(pic)
+
+    def _add_logo(self, shapes):
+        """Adds the circular logo to the bottom left."""
+        logo = asset_image(LOGO_PATH)
+        if logo is None:
+            return
+        # Bottom-left corner positioning with symmetric margin (0.5 inches)
+        size = Inches(0.8)
+        margin = Inches(0.5)
+        left = margin
+        bottom = self.SLIDE_HEIGHT - Inches(0.9)
+        pic = self._add_picture(shapes, logo, left, bottom, width=size)
+        # Add hyperlink
+        pic.click_action.target_full_uri = "https://www.jxgqc.online"
 
     def create_title_slide(self):
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6]) # Blank
-        self._set_bg(slide)
-        self._add_card_container(slide)
-        self._add_logo(slide)
+        slide = self._new_slide()
         
         # Centering helper
         cx = self.SLIDE_WIDTH / 2
@@ -299,211 +376,301 @@ class QuizRenderer:
         # Actually _add_page_num adds "00 / 00". For title, let's just use it or add a custom one.
         # Let's adjust _add_page_num to skip numbers if num is 0.
 
-    def add_question_slides(self, questions):
-        total = len(questions)
+    def add_question_slides(self, questions, total=None, workers=1, progress=None):
+        """
+        Adds the slides of each question: three reveal steps (blank, answer,
+        analysis), or with reveal='animate' one slide that reveals the answer
+        and then the analysis on clicks.
+
+        questions may be a list or any iterable, e.g. QuizParser.iter_questions(),
+        so slides are built while parsing is still running. The page total comes
+        from total, then len(questions); if neither is known it is deferred and
+        the page numbers are filled in once the last question has been rendered.
+
+        With workers > 1 (None for one per CPU) the slides are built in a
+        process pool and merged in order; the output matches the serial path.
+        An iterable is read to the end first in that mode.
+
+        progress(done, total) is called after each question's slides are
+        added; total is None while it is still unknown.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 1:
+            questions = list(questions)
+            if len(questions) > PARALLEL_CHUNK_SIZE:
+                return self._add_question_slides_parallel(
+                    questions, total or len(questions), workers, progress)
+
+        if total is None and hasattr(questions, '__len__'):
+            total = len(questions)
+        deferred_page_nums = [] if total is None else None
+
+        timer = self.timer
         for idx, q in enumerate(questions, 1):
-            q_num = q['number']
-            q_text_masked = q['question']
-            answer_char = q['real_answer'] if q['real_answer'] else "?"
-            options = q['options']
-            expl_text = q['explanation']
-            
-            # --- Generate 3 Steps ---
-            for step in range(1, 4):
-                slide = self.prs.slides.add_slide(self.prs.slide_layouts[6]) # Blank
-                self._set_bg(slide)
-                self._add_card_container(slide)
-                self._add_logo(slide)
-                self._add_page_num(slide, idx, total)
-                
-                # --- Content Area ---
-                margin_left = Inches(1.2)
-                current_y = Inches(1.0) # Start top (Stem)
-                content_width = Inches(11)
+            # Measured once; the three steps only differ in what they reveal
+            with timer.stage(STAGE_MEASURE):
+                layout = self._plan_question_layout(q)
 
-                # --- PIL MEASUREMENT ENGINE ---
-                from PIL import ImageFont, ImageDraw, Image
-                
-                def measure_text_exact(text, font_size_pt, width_inches, font_path=None):
-                    """
-                    Uses PIL to simulate text wrapping and calculate exact height.
-                    """
-                    if font_path is None:
-                        # renderer.py is in 'src', assets is in root.
-                        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                        font_path = os.path.join(root_dir, "assets", "msyh.ttc")
-                        
-                        # Fallback for local dev if missing in assets
-                        if not os.path.exists(font_path):
-                            font_path = "C:/Windows/Fonts/msyh.ttc"
-
-                    font_size_px = int(font_size_pt * 1.333)
-                    max_width_px = int(width_inches * 96)
-                    
-                    try:
-                        # Use TTC index 0 for standard MS YaHei
-                        font = ImageFont.truetype(font_path, font_size_px, index=0)
-                    except IOError:
-                        # Fallback to default if font not found
-                        font = ImageFont.load_default()
-                    
-                    # Manual Word Wrap Logic
-                    # We need to split text into lines that fit max_width_px
-                    lines = []
-                    
-                    # Split by explicit newlines first
-                    paragraphs = text.split('\n')
-                    
-                    for para in paragraphs:
-                        current_line = ""
-                        for char in para:
-                            test_line = current_line + char
-                            w = font.getbbox(test_line)[2] # width (right - left)
-                            if w <= max_width_px:
-                                current_line = test_line
-                            else:
-                                if current_line: lines.append(current_line)
-                                current_line = char
-                        if current_line: lines.append(current_line)
-                    
-                    num_lines = len(lines)
-                    if num_lines < 1: num_lines = 1
-                    
-                    # Calculate Height
-                    # Line spacing in PPT: we set Pt(34) for options (font 24). ~1.4x
-                    # For Stem (font 26), line spacing is auto (~1.2x).
-                    # Let's use proportional line height based on font size.
-                    
-                    if font_size_pt == 26: # Stem
-                        line_height_pt = 36 # approx 1.4x 26
-                    elif font_size_pt == 24: # Options
-                        line_height_pt = 34 # Explicit requested
-                    elif font_size_pt == 20: # Analysis
-                        line_height_pt = 28 # approx 1.4x 20
-                    else:
-                        line_height_pt = font_size_pt * 1.4
-                        
-                    return Pt(num_lines * line_height_pt)
+            with timer.stage(STAGE_SHAPES):
+                run_nums = self._add_question(q, layout, idx, total)
+            if deferred_page_nums is not None:
+                deferred_page_nums.extend((run_num, idx) for run_num in run_nums)
+            else:
+                self._write_finished_slides()
 
-                # 1. STEM (Question Text)
-                stem_est_h = measure_text_exact(q_text_masked, 26, 11)
-                # Padding buffer just in case
-                stem_est_h += Pt(10) 
-                
-                stem_box = slide.shapes.add_textbox(margin_left, current_y, content_width, stem_est_h)
-                stem_box.text_frame.word_wrap = True
-                stem_box.text_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
-                p = stem_box.text_frame.paragraphs[0]
-                p.alignment = PP_ALIGN.LEFT
-                
-                self._render_stem(p, q_text_masked, answer_char, step, q.get('question_rich', []))
-                
-                current_y += stem_est_h + Pt(8)
-                
-                # 2. OPTIONS
-                # Threshold calculation
-                is_full_width = any([len(o) > 12 for o in options])
-                # col_w is in Emu (Inches returns Emu)
-                col_w = content_width if is_full_width else int(content_width / 2)
-                
-                option_rows = []
-                if is_full_width:
-                    for opt in options: option_rows.append([opt])
-                else:
-                    for i in range(0, len(options), 2):
-                        row_opts = [options[i]]
-                        if i + 1 < len(options): row_opts.append(options[i+1])
-                        option_rows.append(row_opts)
-                
-                for row_opts in option_rows:
-                    max_h = Pt(0)
-                    for opt in row_opts:
-                        # Convert EMU back to inches float for measurement
-                        w_in = col_w / 914400.0
-                        h = measure_text_exact(opt, 24, w_in)
-                        if h > max_h: max_h = h
-                    
-                    if max_h < Inches(0.5): max_h = Inches(0.5) 
-                    
-                    for c_idx, opt in enumerate(row_opts):
-                        x = int(margin_left + (c_idx * col_w))
-                        
-                        opt_box = slide.shapes.add_textbox(x, int(current_y), int(col_w), int(max_h))
-                        opt_box.text_frame.word_wrap = True
-                        opt_box.text_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
-                        
-                        p = opt_box.text_frame.paragraphs[0]
-                        p.text = opt
-                        p.font.name = self.FONT_MAIN
-                        p.font.size = Pt(24)
-                        
-                        # Highlight Option if it matches answer in Step 2+
-                        # Option format usually "A. content" or "A.content"
-                        # We check if it starts with "A." or "A ."
-                        match_answer = False
-                        if step >= 2 and answer_char:
-                            prefix = f"{answer_char}."
-                            if opt.strip().startswith(prefix):
-                                match_answer = True
-                        
-                        if match_answer:
-                            p.font.color.rgb = self.RED_ANSWER
-                            p.font.bold = True
-                        else:
-                            p.font.color.rgb = self.TEXT_LIGHT
-                            
-                        p.line_spacing = Pt(34)
-                    
-                    current_y += max_h + Pt(5)
-
-                # 3. ANALYSIS (Explanation)
-                if step >= 3:
-                     # Only show if not overflowing absurdly
-                    current_y += Pt(10)
-                    
-                    an_height = measure_text_exact(expl_text, 20, 10.8)
-                    an_height += Pt(20) # Padding
-                    
-                    # Decor Bar
-                    bar = slide.shapes.add_shape(
-                        MSO_SHAPE.RECTANGLE,
-                        margin_left, current_y, Inches(0.1), an_height
-                    )
-                    bar.fill.solid()
-                    bar.fill.fore_color.rgb = self.ACCENT_COLOR
-                    bar.line.fill.background()
-                    
-                    # BG
-                    bg = slide.shapes.add_shape(
-                        MSO_SHAPE.RECTANGLE,
-                        margin_left + Inches(0.1), current_y, content_width - Inches(0.1), an_height
-                    )
-                    bg.fill.solid()
-                    bg.fill.fore_color.rgb = self.ANALYSIS_BG
-                    bg.line.fill.background()
-                    
-                    # Text
-                    txBox = slide.shapes.add_textbox(
-                         margin_left + Inches(0.2), current_y + Inches(0.1), 
-                         content_width - Inches(0.4), an_height - Inches(0.2)
-                    )
-                    txBox.text_frame.word_wrap = True
-                    txBox.text_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
-                    p = txBox.text_frame.paragraphs[0]
-                    p.text = "【解析】 " + expl_text
-                    p.font.name = self.FONT_MAIN
-                    p.font.size = Pt(20)
-                    p.font.color.rgb = self.ACCENT_DARK 
+            if progress:
+                progress(idx, total)
+
+        if deferred_page_nums:
+            total = deferred_page_nums[-1][1]
+            for run_num, idx in deferred_page_nums:
+                run_num.text = f"{idx:02d} / {total:02d}"
+        self._write_finished_slides()
+
+    def _add_question_slides_parallel(self, questions, total, workers, progress=None):
+        """
+        Builds question slides in worker processes and appends them in order.
+
+        Measurement happens in the workers, so the whole wall time of the
+        pool is timed as shape creation.
+        """
+        chunks = [
+            (start + 1, questions[start:start + PARALLEL_CHUNK_SIZE])
+            for start in range(0, len(questions), PARALLEL_CHUNK_SIZE)
+        ]
+        with self.timer.stage(STAGE_SHAPES), ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_init_slide_worker,
+            initargs=(self.subject, self.reveal),
+        ) as pool:
+            # map yields chunk results in submission order
+            results = pool.map(_render_slide_chunk, chunks, [total] * len(chunks))
+            done = 0
+            for (_, chunk), slide_xml in zip(chunks, results):
+                for sp_tree, timing in slide_xml:
+                    slide = self._new_slide()
+                    old = slide.shapes._spTree
+                    old.getparent().replace(old, parse_xml(sp_tree))
+                    if timing is not None:
+                        slide._element.append(parse_xml(timing))
+                self._write_finished_slides()
+                done += len(chunk)
+                if progress:
+                    progress(done, total)
+
+    def _plan_question_layout(self, q):
+        """
+        Positions and sizes every content box of a question.
+
+        Returns a dict with the stem box, the option boxes (grouped in rows,
+        with the answer option flagged) and the analysis block, so the three
+        reveal steps reuse one set of measurements.
+        """
+        answer_char = q['real_answer'] if q['real_answer'] else "?"
+        options = q['options']
+
+        # --- Content Area ---
+        margin_left = Inches(1.2)
+        current_y = Inches(1.0) # Start top (Stem)
+        content_width = Inches(11)
+
+        # 1. STEM (Question Text)
+        stem_est_h = measure_text_exact(q['question'], 26, 11)
+        # Padding buffer just in case
+        stem_est_h += Pt(10)
+        stem = (margin_left, current_y, content_width, stem_est_h)
+        current_y += stem_est_h + Pt(8)
+
+        # 2. OPTIONS
+        # Threshold calculation
+        is_full_width = any([len(o) > 12 for o in options])
+        # col_w is in Emu (Inches returns Emu)
+        col_w = content_width if is_full_width else int(content_width / 2)
+
+        option_rows = []
+        if is_full_width:
+            for opt in options: option_rows.append([opt])
+        else:
+            for i in range(0, len(options), 2):
+                row_opts = [options[i]]
+                if i + 1 < len(options): row_opts.append(options[i+1])
+                option_rows.append(row_opts)
+
+        # Option format usually "A. content" or "A.content"
+        # We check if it starts with "A." or "A ."
+        prefix = f"{answer_char}."
+        option_boxes = []
+
+        # Convert EMU back to inches float for measurement
+        w_in = col_w / 914400.0
+        for row_opts in option_rows:
+            max_h = max([Pt(0)] + get_measurer().measure_many(row_opts, 24, w_in))
+
+            if max_h < Inches(0.5): max_h = Inches(0.5)
+
+            for c_idx, opt in enumerate(row_opts):
+                x = int(margin_left + (c_idx * col_w))
+                option_boxes.append({
+                    'text': opt,
+                    'box': (x, int(current_y), int(col_w), int(max_h)),
+                    'is_answer': opt.strip().startswith(prefix),
+                })
+
+            current_y += max_h + Pt(5)
+
+        # 3. ANALYSIS (Explanation)
+        # Only show if not overflowing absurdly
+        current_y += Pt(10)
+        an_height = measure_text_exact(q['explanation'], 20, 10.8)
+        an_height += Pt(20) # Padding
+
+        return {
+            'answer_char': answer_char,
+            'margin_left': margin_left,
+            'content_width': content_width,
+            'stem': stem,
+            'options': option_boxes,
+            'analysis': (current_y, an_height),
+        }
+
+    def _add_question(self, q, layout, idx, total):
+        """Adds the slides of one question in the reveal mode; returns their page number runs."""
+        if self.reveal == REVEAL_ANIMATE:
+            return [self._add_animated_question_slide(q, layout, idx, total)]
+        return [self._add_question_slide(q, layout, step, idx, total) for step in range(1, 4)]
+
+    def _add_question_slide(self, q, layout, step, idx, total):
+        """Adds one reveal step of a question from its layout; returns the page number run."""
+        slide = self._new_slide()
+        run_num = self._add_page_num(slide, idx, total or 0)
+        shapes = slide.shapes
+
+        # 1. STEM (Question Text)
+        self._add_stem(shapes, q, layout, step)
+
+        # 2. OPTIONS
+        for opt in layout['options']:
+            # Highlight Option if it matches answer in Step 2+
+            self._add_option(shapes, opt, step >= 2 and opt['is_answer'])
+
+        # 3. ANALYSIS (Explanation)
+        if step >= 3:
+            self._add_analysis(shapes, q, layout)
+
+        return run_num
+
+    def _add_animated_question_slide(self, q, layout, idx, total):
+        """
+        Adds a question as one slide whose reveal steps are click animations;
+        returns the page number run.
+
+        Click 1 swaps the stem and the answer option for their answered
+        versions (PowerPoint animates shapes, not single runs, so both
+        versions are on the slide at the same position). Click 2 shows the
+        analysis group.
+        """
+        slide = self._new_slide()
+        run_num = self._add_page_num(slide, idx, total or 0)
+        shapes = slide.shapes
+
+        # (shape id, entrance or exit) per click
+        answer_click = [
+            (self._add_stem(shapes, q, layout, 1).shape_id, ANIM_EXIT),
+            (self._add_stem(shapes, q, layout, 2).shape_id, ANIM_ENTRANCE),
+        ]
+        for opt in layout['options']:
+            box = self._add_option(shapes, opt, False)
+            if opt['is_answer']:
+                answer_click.append((box.shape_id, ANIM_EXIT))
+                answer_click.append((self._add_option(shapes, opt, True).shape_id, ANIM_ENTRANCE))
+
+        analysis = shapes.add_group_shape()
+        self._add_analysis(analysis.shapes, q, layout)
+        analysis_click = [(analysis.shape_id, ANIM_ENTRANCE)]
+
+        text_ids = [shape_id for shape_id, _ in answer_click]
+        slide._element.append(parse_xml(_reveal_timing_xml([answer_click, analysis_click], text_ids)))
+        return run_num
+
+    def _add_stem(self, shapes, q, layout, step):
+        """The stem text box as shown at step; the answer is filled in from step 2."""
+        stem_box = shapes.add_textbox(*layout['stem'])
+        stem_box.text_frame.word_wrap = True
+        stem_box.text_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
+        p = stem_box.text_frame.paragraphs[0]
+        p.alignment = PP_ALIGN.LEFT
+
+        self._render_stem(p, q['question'], layout['answer_char'], step, q.get('question_rich', []))
+        return stem_box
+
+    def _add_option(self, shapes, opt, highlight):
+        """One option text box of a layout, in the answer colour when highlight is set."""
+        opt_box = shapes.add_textbox(*opt['box'])
+        opt_box.text_frame.word_wrap = True
+        opt_box.text_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
+
+        p = opt_box.text_frame.paragraphs[0]
+        p.text = opt['text']
+        p.font.name = self.FONT_MAIN
+        p.font.size = Pt(24)
+
+        if highlight:
+            p.font.color.rgb = self.RED_ANSWER
+            p.font.bold = True
+        else:
+            p.font.color.rgb = self.TEXT_LIGHT
+
+        p.line_spacing = Pt(34)
+        return opt_box
+
+    def _add_analysis(self, shapes, q, layout):
+        """The analysis block: accent bar, background and explanation text."""
+        margin_left = layout['margin_left']
+        content_width = layout['content_width']
+        current_y, an_height = layout['analysis']
+
+        # Decor Bar
+        bar = shapes.add_shape(
+            MSO_SHAPE.RECTANGLE,
+            margin_left, current_y, Inches(0.1), an_height
+        )
+        bar.fill.solid()
+        bar.fill.fore_color.rgb = self.ACCENT_COLOR
+        bar.line.fill.background()
+
+        # BG
+        bg = shapes.add_shape(
+            MSO_SHAPE.RECTANGLE,
+            margin_left + Inches(0.1), current_y, content_width - Inches(0.1), an_height
+        )
+        bg.fill.solid()
+        bg.fill.fore_color.rgb = self.ANALYSIS_BG
+        bg.line.fill.background()
+
+        # Text
+        txBox = shapes.add_textbox(
+             margin_left + Inches(0.2), current_y + Inches(0.1),
+             content_width - Inches(0.4), an_height - Inches(0.2)
+        )
+        txBox.text_frame.word_wrap = True
+        txBox.text_frame.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
+        p = txBox.text_frame.paragraphs[0]
+        p.text = "【解析】 " + q['explanation']
+        p.font.name = self.FONT_MAIN
+        p.font.size = Pt(20)
+        p.font.color.rgb = self.ACCENT_DARK
 
     def _render_stem(self, p, q_text_masked, answer_char, step, question_rich=None):
         """Renders the question stem with interactive inline answer, supporting rich text formatting."""
-        # Debug logging
-        if question_rich:
-            print(f"[DEBUG] _render_stem 收到 question_rich: {len(question_rich)} 个片段")
-            has_formatting = any(r.get('format', {}).get('bold') or r.get('format', {}).get('underline') for r in question_rich)
-            print(f"[DEBUG] 包含格式: {has_formatting}")
-        else:
-            print(f"[DEBUG] _render_stem question_rich 为空")
+        # Debug logging; the formatting scan only runs when DEBUG is enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            if question_rich:
+                has_formatting = any(r.get('format', {}).get('bold') or r.get('format', {}).get('underline') for r in question_rich)
+                logger.debug("_render_stem 收到 question_rich: %d 个片段, 包含格式: %s",
+                             len(question_rich), has_formatting)
+            else:
+                logger.debug("_render_stem question_rich 为空")
         
         # Check if we have rich text data to use
         if question_rich and isinstance(question_rich, list) and len(question_rich) > 0:
@@ -626,5 +793,136 @@ class QuizRenderer:
                 run.text = f"  （ {answer_char} ）"
                 run.font.color.rgb = self.RED_ANSWER
 
-    def save(self):
-        self.prs.save(self.output_file)
+    def save(self, file=None, compress_level=None, optimize=False, image_dpi=DEFAULT_IMAGE_DPI):
+        """
+        Saves the presentation to file, a path or a writable binary file-like
+        object such as io.BytesIO; defaults to output_file.
+
+        compress_level is the deflate level, 0 (stored, fastest) to 9. With
+        optimize the saved deck goes through optimize_pptx (unused layouts
+        and parts pruned, images downsampled to image_dpi) at compress_level
+        or 9; its report (bytes_saved etc.) is returned and kept in
+        size_report. Returns None otherwise.
+
+        After stream_to, save() finishes the streamed file instead; file
+        and optimize are not available then, compress_level was set by
+        stream_to.
+        """
+        if self._stream is not None:
+            if file is not None or optimize:
+                raise ValueError("a streamed deck is saved to its stream_to target, without optimize")
+            self._write_finished_slides()
+            with self.timer.stage(STAGE_SAVE):
+                self._stream.close()
+            self._stream = None
+            return None
+
+        target = file if file is not None else self.output_file
+        with self.timer.stage(STAGE_SAVE):
+            if not optimize:
+                write_presentation(self.prs, target, compress_level)
+                return None
+            buffer = io.BytesIO()
+            self.prs.save(buffer)
+            level = OPTIMIZE_COMPRESS_LEVEL if compress_level is None else compress_level
+            data, self.size_report = optimize_pptx(buffer.getvalue(), level, image_dpi)
+            if isinstance(target, (str, os.PathLike)):
+                with open(target, 'wb') as f:
+                    f.write(data)
+            else:
+                target.write(data)
+            return self.size_report
+
+    def to_bytes(self, **options):
+        """
+        Returns the finished .pptx as bytes without touching the filesystem;
+        options as for save().
+        """
+        buffer = io.BytesIO()
+        self.save(buffer, **options)
+        return buffer.getvalue()
+
+
+# --- Click animations ---
+def _reveal_timing_xml(clicks, text_shape_ids):
+    """
+    p:timing for a slide whose main sequence runs one step per click.
+
+    clicks lists the effects of each click as (shape id, ANIM_ENTRANCE or
+    ANIM_EXIT); the first effect starts on the click, the others with it.
+    text_shape_ids are the animated p:sp shapes, which get a build entry.
+    """
+    ids = itertools.count(3)
+    steps = []
+    for effects in clicks:
+        click_id, par_id = next(ids), next(ids)
+        pars = []
+        for i, (shape_id, effect) in enumerate(effects):
+            effect_id, set_id = next(ids), next(ids)
+            pars.append(
+                f'<p:par><p:cTn id="{effect_id}" presetID="1" presetClass="{effect}" presetSubtype="0" '
+                f'fill="hold" grpId="0" nodeType="{"clickEffect" if i == 0 else "withEffect"}">'
+                '<p:stCondLst><p:cond delay="0"/></p:stCondLst><p:childTnLst>'
+                f'<p:set><p:cBhvr><p:cTn id="{set_id}" dur="1" fill="hold">'
+                '<p:stCondLst><p:cond delay="0"/></p:stCondLst></p:cTn>'
+                f'<p:tgtEl><p:spTgt spid="{shape_id}"/></p:tgtEl>'
+                '<p:attrNameLst><p:attrName>style.visibility</p:attrName></p:attrNameLst></p:cBhvr>'
+                f'<p:to><p:strVal val="{"visible" if effect == ANIM_ENTRANCE else "hidden"}"/></p:to></p:set>'
+                '</p:childTnLst></p:cTn></p:par>'
+            )
+        steps.append(
+            f'<p:par><p:cTn id="{click_id}" fill="hold">'
+            '<p:stCondLst><p:cond delay="indefinite"/></p:stCondLst><p:childTnLst>'
+            f'<p:par><p:cTn id="{par_id}" fill="hold">'
+            '<p:stCondLst><p:cond delay="0"/></p:stCondLst>'
+            f'<p:childTnLst>{"".join(pars)}</p:childTnLst></p:cTn></p:par>'
+            '</p:childTnLst></p:cTn></p:par>'
+        )
+    builds = ''.join(f'<p:bldP spid="{shape_id}" grpId="0" animBg="1"/>' for shape_id in text_shape_ids)
+    return (
+        f'<p:timing {nsdecls("p")}><p:tnLst><p:par>'
+        '<p:cTn id="1" dur="indefinite" restart="never" nodeType="tmRoot"><p:childTnLst>'
+        '<p:seq concurrent="1" nextAc="seek"><p:cTn id="2" dur="indefinite" nodeType="mainSeq">'
+        f'<p:childTnLst>{"".join(steps)}</p:childTnLst></p:cTn>'
+        '<p:prevCondLst><p:cond evt="onPrev" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl></p:cond></p:prevCondLst>'
+        '<p:nextCondLst><p:cond evt="onNext" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl></p:cond></p:nextCondLst>'
+        '</p:seq></p:childTnLst></p:cTn></p:par></p:tnLst>'
+        f'<p:bldLst>{builds}</p:bldLst></p:timing>'
+    )
+
+
+# --- Parallel rendering workers ---
+# Each worker process keeps one renderer, so fonts, measurements and the
+# themed layout are set up once per process rather than once per chunk.
+_worker_renderer = None
+
+
+def _init_slide_worker(subject, reveal=REVEAL_SLIDES):
+    global _worker_renderer
+    _worker_renderer = QuizRenderer(None, subject, reveal=reveal)
+
+
+def _render_slide_chunk(chunk, total):
+    """
+    Renders questions starting at page first_idx; returns each slide's
+    serialized shape tree and timing (None without animations).
+    """
+    first_idx, questions = chunk
+    renderer = _worker_renderer
+    slides = renderer.prs.slides
+    slide_xml = []
+    for idx, q in enumerate(questions, first_idx):
+        layout = renderer._plan_question_layout(q)
+        renderer._add_question(q, layout, idx, total)
+        for slide in slides:
+            timing = slide._element.find(qn('p:timing'))
+            slide_xml.append((
+                etree.tostring(slide.shapes._spTree),
+                None if timing is None else etree.tostring(timing),
+            ))
+
+        # Drop the slides again so the worker presentation does not grow
+        for sld_id in list(slides._sldIdLst):
+            slides._sldIdLst.remove(sld_id)
+            renderer.prs.part.drop_rel(sld_id.rId)
+    return slide_xml
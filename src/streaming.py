@@ -0,0 +1,97 @@
+"""
+Streaming .pptx output.
+
+A PptxStream opens the output zip up front. The renderer hands it each
+finished slide: the slide XML and its relationships are written at once,
+and the slide part is swapped in the package graph for a _WrittenPart that
+keeps only its name, content type and relationships, so the slide's
+object tree can be freed. Memory then stays flat however long the deck.
+
+close() writes everything else after the slides: [Content_Types].xml
+(which still lists every slide), the package relationships,
+presentation.xml with its relationships, and the master, layouts, theme,
+media and docProps parts.
+"""
+
+import os
+import zipfile
+
+from pptx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part, _Relationship
+from pptx.opc.serialized import PackageWriter
+
+from .optimize import zip_options
+
+
+class _WrittenPart(Part):
+    """A part already in the output zip, without its XML."""
+
+    def __init__(self, part):
+        super().__init__(part.partname, part.content_type, part.package)
+        self._written_rels = part.rels
+
+    @property
+    def rels(self):
+        # Keeps the layouts and images the slide uses reachable for close()
+        return self._written_rels
+
+
+class _RemainderWriter(PackageWriter):
+    """PackageWriter onto an open stream that skips the parts written already."""
+
+    def _write(self):
+        stream = self._pkg_file
+        self._write_content_types_stream(stream)
+        self._write_pkg_rels(stream)
+        self._write_parts(stream)
+
+    def _write_parts(self, phys_writer):
+        for part in self._parts:
+            if isinstance(part, _WrittenPart):
+                continue
+            phys_writer.write(part.partname, part.blob)
+            if part.rels:
+                phys_writer.write(part.partname.rels_uri, part.rels.xml)
+
+
+class PptxStream:
+    """
+    Writes the slides of prs to file (a path or writable binary file-like
+    object) one at a time; compress_level as for write_presentation.
+    """
+
+    def __init__(self, prs, file, compress_level=None):
+        self.file = file
+        self._prs_part = prs.part
+        self._zipf = zipfile.ZipFile(file, 'w', strict_timestamps=False, **zip_options(compress_level))
+        self.slides_written = 0
+
+    def write(self, pack_uri, blob):
+        self._zipf.writestr(pack_uri.membername, blob)
+
+    def write_slide(self, rId):
+        """Writes the slide related to the presentation as rId and releases it."""
+        rels = self._prs_part.rels
+        part = rels[rId].target_part
+        self.write(part.partname, part.blob)
+        if part.rels:
+            self.write(part.partname.rels_uri, part.rels.xml)
+        # A new relationship, as _Relationship caches its target
+        rels._rels[rId] = _Relationship(rels._base_uri, rId, RT.SLIDE, RTM.INTERNAL, _WrittenPart(part))
+        self.slides_written += 1
+
+    def close(self):
+        """Writes the remaining parts and closes the zip."""
+        package = self._prs_part.package
+        _RemainderWriter(self, package._rels, tuple(package.iter_parts()))._write()
+        self._zipf.close()
+
+    def discard(self):
+        """Closes the unfinished zip; a file written by path is removed."""
+        self._zipf.close()
+        if isinstance(self.file, (str, os.PathLike)):
+            try:
+                os.remove(self.file)
+            except OSError:
+                pass
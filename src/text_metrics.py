@@ -0,0 +1,258 @@
+"""
+Text Measurement Service for Slide Layout
+
+Simulates PowerPoint word wrapping with PIL to estimate text box heights.
+Font objects are loaded once per (path, size, index) and measurements are
+memoized in a bounded LRU, so repeated strings (option labels, identical
+option sets) are measured once per process.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from PIL import ImageFont
+from pptx.util import Pt
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: only speeds up count_lines_batch
+    np = None
+
+# renderer.py is in 'src', assets is in root.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Fallback for local dev if missing in assets
+SYSTEM_FONT_PATH = "C:/Windows/Fonts/msyh.ttc"
+
+# Measurements kept per measurer; a 500-question batch repeats far fewer strings
+MEASURE_CACHE_SIZE = 8192
+
+
+def default_font_path():
+    """Returns the MS YaHei font used for measurement."""
+    font_path = os.path.join(ROOT_DIR, "assets", "msyh.ttc")
+    if not os.path.exists(font_path):
+        font_path = SYSTEM_FONT_PATH
+    return font_path
+
+
+def line_height_pt(font_size_pt):
+    """Line height used by the slide text boxes for a given font size."""
+    # Line spacing in PPT: we set Pt(34) for options (font 24). ~1.4x
+    # For Stem (font 26), line spacing is auto (~1.2x).
+    if font_size_pt == 26: # Stem
+        return 36 # approx 1.4x 26
+    elif font_size_pt == 24: # Options
+        return 34 # Explicit requested
+    elif font_size_pt == 20: # Analysis
+        return 28 # approx 1.4x 20
+    return font_size_pt * 1.4
+
+
+class TextMeasurer:
+    """Measures wrapped text heights with cached fonts and results."""
+
+    def __init__(self, font_path=None, cache_size=MEASURE_CACHE_SIZE):
+        self.font_path = font_path or default_font_path()
+        self.get_font = lru_cache(maxsize=None)(self._load_font)
+        self._glyphs = {}
+
+        # (text, size, width, font_path) -> height, least recently used first
+        self._results = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_font(self, font_path, size_px, index=0):
+        try:
+            # Use TTC index 0 for standard MS YaHei
+            return ImageFont.truetype(font_path, size_px, index=index)
+        except IOError:
+            # Fallback to default if font not found
+            return ImageFont.load_default()
+
+    def _glyph_table(self, font):
+        """Per-character (advance, bbox right) for a font, filled on demand."""
+        glyphs = self._glyphs.get(font)
+        if glyphs is None:
+            glyphs = self._glyphs[font] = {}
+        return glyphs
+
+    def _glyph(self, font, glyphs, char):
+        metrics = glyphs[char] = (font.getlength(char), font.getbbox(char)[2])
+        return metrics
+
+    def _estimate_break(self, para, start, font, glyphs, max_width_px):
+        """
+        Estimates where the line starting at start breaks, in one pass.
+
+        The width of a line is the furthest right edge of its glyphs, each
+        placed at the running sum of the advances before it.
+        """
+        pen = 0.0
+        extent = 0.0
+        for i in range(start, len(para)):
+            char = para[i]
+            advance, right = glyphs.get(char) or self._glyph(font, glyphs, char)
+            extent = max(extent, pen + right)
+            if extent > max_width_px and i > start:
+                return i
+            pen += advance
+        return len(para)
+
+    def _confirm_break(self, para, start, end, font, max_width_px):
+        """
+        Checks an estimated break against the real text bbox.
+
+        The bbox width only grows as characters are appended, so the greedy
+        break is where para[start:end] fits and one more character does not.
+        Kerning or rounding can move it by a character; step until it holds.
+        A line always keeps at least one character.
+        """
+        while end < len(para) and font.getbbox(para[start:end + 1])[2] <= max_width_px:
+            end += 1
+        while end - start > 1 and font.getbbox(para[start:end])[2] > max_width_px:
+            end -= 1
+        return end
+
+    def count_lines(self, text, font, max_width_px):
+        """
+        Counts the lines text wraps to within max_width_px.
+
+        Breaks are estimated from cached glyph advances and confirmed with one
+        getbbox per line, so a paragraph costs O(n) instead of a getbbox for
+        every growing prefix.
+        """
+        glyphs = self._glyph_table(font)
+        num_lines = 0
+
+        # Split by explicit newlines first
+        for para in text.split('\n'):
+            start = 0
+            while start < len(para):
+                end = self._estimate_break(para, start, font, glyphs, max_width_px)
+                start = self._confirm_break(para, start, end, font, max_width_px)
+                num_lines += 1
+
+        return max(num_lines, 1)
+
+    def count_lines_batch(self, texts, font, max_width_px):
+        """
+        Line counts for many texts at once.
+
+        With NumPy, advances for the whole batch are summed with cumsum and
+        every break is estimated with searchsorted over the running maximum of
+        glyph right edges; breaks are then confirmed as in count_lines.
+        Without NumPy this is count_lines in a loop.
+        """
+        if np is None:
+            return [self.count_lines(text, font, max_width_px) for text in texts]
+
+        glyphs = self._glyph_table(font)
+        paras = []
+        owners = []
+        for k, text in enumerate(texts):
+            for para in text.split('\n'):
+                paras.append(para)
+                owners.append(k)
+
+        metrics = [glyphs.get(char) or self._glyph(font, glyphs, char) for char in ''.join(paras)]
+        metrics = np.array(metrics, dtype=float).reshape(-1, 2)
+        pens = np.concatenate(([0.0], np.cumsum(metrics[:, 0])))
+        # Right edge of every glyph, as if one line started at the batch start
+        right_edges = np.maximum.accumulate(pens[:-1] + metrics[:, 1])
+
+        counts = [0] * len(texts)
+        offset = 0
+        for para, owner in zip(paras, owners):
+            start = 0
+            while start < len(para):
+                limit = pens[offset + start] + max_width_px
+                end = int(np.searchsorted(right_edges, limit, side='right')) - offset
+                end = min(max(end, start + 1), len(para))
+                start = self._confirm_break(para, start, end, font, max_width_px)
+                counts[owner] += 1
+            offset += len(para)
+
+        return [max(count, 1) for count in counts]
+
+    def _lookup(self, key):
+        with self._lock:
+            height = self._results.get(key)
+            if height is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._results.move_to_end(key)
+            return height
+
+    def _store(self, key, height):
+        with self._lock:
+            self._results[key] = height
+            if len(self._results) > self._cache_size:
+                self._results.popitem(last=False)
+
+    def measure(self, text, font_size_pt, width_inches, font_path=None):
+        """
+        Uses PIL to simulate text wrapping and calculate exact height.
+        """
+        key = (text, font_size_pt, width_inches, font_path or self.font_path)
+        height = self._lookup(key)
+        if height is None:
+            font = self.get_font(key[3], int(font_size_pt * 1.333), 0)
+            num_lines = self.count_lines(text, font, int(width_inches * 96))
+            height = Pt(num_lines * line_height_pt(font_size_pt))
+            self._store(key, height)
+        return height
+
+    def measure_many(self, texts, font_size_pt, width_inches, font_path=None):
+        """Measures several texts of the same size and width in one batch."""
+        font_path = font_path or self.font_path
+        keys = [(text, font_size_pt, width_inches, font_path) for text in texts]
+        heights = [self._lookup(key) for key in keys]
+
+        missing = [i for i, height in enumerate(heights) if height is None]
+        if missing:
+            font = self.get_font(font_path, int(font_size_pt * 1.333), 0)
+            counts = self.count_lines_batch([texts[i] for i in missing], font, int(width_inches * 96))
+            for i, num_lines in zip(missing, counts):
+                heights[i] = Pt(num_lines * line_height_pt(font_size_pt))
+                self._store(keys[i], heights[i])
+
+        return heights
+
+    def stats(self):
+        """Returns measurement cache counters."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._results),
+            'fonts': self.get_font.cache_info().currsize,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+        self.get_font.cache_clear()
+        self._glyphs.clear()
+
+
+_measurer = None
+
+
+def get_measurer():
+    """Returns the process-wide TextMeasurer."""
+    global _measurer
+    if _measurer is None:
+        _measurer = TextMeasurer()
+    return _measurer
+
+
+def measure_text_exact(text, font_size_pt, width_inches, font_path=None):
+    """Measures with the process-wide TextMeasurer."""
+    return get_measurer().measure(text, font_size_pt, width_inches, font_path)
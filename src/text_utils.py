@@ -1,3 +1,5 @@
+from bisect import bisect_right
+
 # Helper function to convert rich text runs to plain text
 def rich_text_to_plain(rich_text_runs):
     """Converts rich text format to plain text string."""
@@ -13,3 +15,77 @@ def plain_to_rich(text):
     if not text:
         return []
     return [{'text': text, 'format': {'bold': False, 'italic': False, 'underline': False, 'emphasis': None}}]
+
+# Helper function to get the start offset of every run in the joined text
+def run_offsets(rich_text_runs):
+    """Returns the start offset of each run within ''.join(run texts)."""
+    offsets = []
+    pos = 0
+    for run in rich_text_runs:
+        offsets.append(pos)
+        pos += len(run['text'])
+    return offsets
+
+# Helper function to cut rich text by character offsets
+def slice_runs(rich_text_runs, start, end, offsets=None):
+    """
+    Returns the runs covering text[start:end], cutting the boundary runs.
+
+    offsets (from run_offsets) can be passed in when slicing the same
+    paragraph several times.
+    """
+    if offsets is None:
+        offsets = run_offsets(rich_text_runs)
+
+    sliced = []
+    # First run that can overlap the range
+    i = max(bisect_right(offsets, start) - 1, 0)
+    while i < len(rich_text_runs) and offsets[i] < end:
+        run = rich_text_runs[i]
+        run_start = offsets[i]
+        piece = run['text'][max(start - run_start, 0):end - run_start]
+        if piece:
+            if piece == run['text']:
+                sliced.append(run)
+            else:
+                sliced.append({'text': piece, 'format': run['format']})
+        i += 1
+    return sliced
+
+# Helper function to trim whitespace at both ends of rich text
+def strip_runs(rich_text_runs):
+    """Rich text equivalent of str.strip()."""
+    text = rich_text_to_plain(rich_text_runs)
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    if start == 0 and end == len(text):
+        return rich_text_runs
+    return slice_runs(rich_text_runs, start, end)
+
+# Helper function to apply a regex substitution to rich text
+def sub_runs(pattern, repl, rich_text_runs):
+    """
+    Rich text equivalent of pattern.sub(repl, text) for a literal repl.
+
+    Text between matches keeps its formatting; each replacement becomes one
+    run carrying the format of the run where the match starts.
+    """
+    if not rich_text_runs:
+        return rich_text_runs
+
+    text = rich_text_to_plain(rich_text_runs)
+    spans = [m.span() for m in pattern.finditer(text)]
+    if not spans:
+        return rich_text_runs
+
+    offsets = run_offsets(rich_text_runs)
+    result = []
+    pos = 0
+    for start, end in spans:
+        result.extend(slice_runs(rich_text_runs, pos, start, offsets))
+        owner = rich_text_runs[max(bisect_right(offsets, start) - 1, 0)]
+        if repl:
+            result.append({'text': repl, 'format': owner['format']})
+        pos = end
+    result.extend(slice_runs(rich_text_runs, pos, len(text), offsets))
+    return result
@@ -1,8 +1,7 @@
 import streamlit as st
 import os
-import tempfile
-from src.parser import QuizParser
-from src.renderer import QuizRenderer
+import time
+from src.jobs import JobQueue, QUEUED, RUNNING, FAILED
 
 # 1. Page Config & CSS
 st.set_page_config(page_title="山海寻梦 | 课件转换器", page_icon="🎨", layout="centered")
@@ -119,56 +118,71 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# Seconds between progress refreshes while a job runs
+POLL_INTERVAL = 1.0
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    """
+    Worker pool shared by every session of this server process.
+
+    Workers load the template and fonts once when they start; finished
+    results stay in the queue for a bounded time and count, so re-submitting
+    the same upload returns the existing job.
+    """
+    return JobQueue()
+
 # 2. Main UI
 st.markdown('<h1 class="main-header">山海寻梦 · 课件编辑器</h1>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">高效、自动的 Docx 转 PPT 转换工具</p>', unsafe_allow_html=True)
 
 uploaded_file = st.file_uploader("选择文件或将其拖放到此处", type=["docx"])
+poll = False
 
 if uploaded_file is not None:
     st.success(f"已就绪: {uploaded_file.name}")
     
     if st.button("立即转换"):
-        with st.status("正在处理中...", expanded=True) as status:
-            try:
-                # Use temp files for cloud environment
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_in:
-                    tmp_in.write(uploaded_file.getvalue())
-                    input_path = tmp_in.name
-                
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pptx") as tmp_out:
-                    output_path = tmp_out.name
-
-                st.write("🏃 开始解析文档并识别学科...")
-                parser = QuizParser()
-                questions = parser.parse(input_path)
-                subject = parser.infer_subject()
-                
-                if not questions:
-                    st.error("❌ 未发现试题，请确认文档内容。")
-                    st.stop()
-                
-                st.write(f"🎨 正在应用专业排版 ({subject} / {len(questions)} 道题)...")
-                renderer = QuizRenderer(output_path, subject)
-                renderer.create_title_slide()
-                renderer.add_question_slides(questions)
-                renderer.save()
-                
-                status.update(label="✅ 任务完成！", state="complete")
-                
-                # Provide download link
-                with open(output_path, "rb") as f:
-                    st.download_button(
-                        label="⬇️ 免费下载生成的 PPTX 文件",
-                        data=f,
-                        file_name=f"{os.path.splitext(uploaded_file.name)[0]}.pptx",
-                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                    )
-                
-                os.unlink(input_path)
-            except Exception as e:
-                status.update(label="❌ 发生错误", state="error")
-                st.error(f"分析失败: {str(e)}")
+        # Converted in a worker process: the upload bytes go straight to the
+        # parser and the deck comes back as bytes for the download button
+        st.session_state['job_id'] = get_job_queue().submit(uploaded_file.getvalue(), uploaded_file.name)
+        st.session_state['job_upload'] = (uploaded_file.name, uploaded_file.size)
+
+    # Only show the job that belongs to the file currently uploaded
+    job_id = st.session_state.get('job_id')
+    if st.session_state.get('job_upload') != (uploaded_file.name, uploaded_file.size):
+        job_id = None
+    job = get_job_queue().status(job_id) if job_id else None
+
+    if job:
+        if job['state'] == QUEUED:
+            st.info(f"⏳ 排队中，前方还有 {job['position'] - 1} 个任务...")
+            poll = True
+        elif job['state'] == RUNNING:
+            if job['total']:
+                st.progress(job['done'] / job['total'], text=f"🎨 正在生成幻灯片：第 {job['done']} / {job['total']} 题")
+            else:
+                st.progress(0.0, text="🏃 开始解析文档并识别学科...")
+            poll = True
+        elif job['state'] == FAILED:
+            st.error(f"分析失败: {job['error']}")
+        elif not job['result']['pptx']:
+            st.error("❌ 未发现试题，请确认文档内容。")
+        else:
+            result = job['result']
+            if result['cached']:
+                st.write(f"⚡ 已找到相同文档的转换结果 ({result['subject']} / {result['questions']} 道题)")
+            else:
+                st.write(f"🎨 已应用专业排版 ({result['subject']} / {result['questions']} 道题)")
+            st.success("✅ 任务完成！")
+
+            # Provide download link
+            st.download_button(
+                label="⬇️ 免费下载生成的 PPTX 文件",
+                data=result['pptx'],
+                file_name=f"{os.path.splitext(uploaded_file.name)[0]}.pptx",
+                mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+            )
 
 # 3. Footer
 st.markdown("""
@@ -180,3 +194,8 @@ st.markdown("""
         <p>© 2026 山海寻梦. 无需注册，完全免费的在线转换工具。</p>
     </div>
     """, unsafe_allow_html=True)
+
+# Refresh job progress; placed last so the whole page renders between polls
+if poll:
+    time.sleep(POLL_INTERVAL)
+    st.rerun()